@@ -11,166 +11,207 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.join(current_dir, 'src')
 sys.path.insert(0, src_dir)
 
-from database.manager import DatabaseManager
+from database.manager import DatabaseManager, CATEGORY_COVERING_INDEX
 from utils.helpers import classify_product_category
 
-def analyze_categories():
-    """Analyze current categorization in the database"""
+# Fields needed for the analysis - avoids transferring whole documents
+PRODUCT_FIELDS = {'url': 1, 'title': 1, 'category': 1, '_id': 0}
+
+# Number of example products printed per issue type
+SAMPLE_SIZE = 5
+
+# Number of suggested recategorizations printed
+CHANGE_SAMPLE_SIZE = 10
+
+# Documents fetched per cursor round-trip while streaming products
+BATCH_SIZE = 1000
+
+CATEGORY_COUNTS_PIPELINE = [{'$group': {'_id': '$category', 'count': {'$sum': 1}}}]
+MISSING_CATEGORY_FILTER = {'category': {'$in': [None, '']}}
+GENERIC_CATEGORY_FILTER = {'category': 'Electronics'}
+UNCATEGORIZED_FILTER = {'category': {'$in': [None, '', 'Electronics']}}
+
+# Most common title words among generic products, counted server-side:
+# split titles on whitespace, keep only letters/digits of each word,
+# and count words longer than 3 characters
+KEYWORD_FREQUENCY_PIPELINE = [
+    {'$match': UNCATEGORIZED_FILTER},
+    {'$project': {'_id': 0, 'words': {'$regexFindAll': {
+        'input': {'$toLower': {'$ifNull': ['$title', '']}},
+        'regex': r'\S+'
+    }}}},
+    {'$unwind': '$words'},
+    {'$project': {'word': {'$reduce': {
+        'input': {'$regexFindAll': {'input': '$words.match', 'regex': r'[\p{L}\p{N}]+'}},
+        'initialValue': '',
+        'in': {'$concat': ['$$value', '$$this.match']}
+    }}}},
+    {'$match': {'$expr': {'$gt': [{'$strLenCP': '$word'}, 3]}}},
+    {'$group': {'_id': '$word', 'count': {'$sum': 1}}},
+    {'$sort': {'count': -1, '_id': 1}},
+    {'$limit': 20}
+]
+
+def analyze_categories(db):
+    """
+    Analyze current categorization in the database
+    
+    Args:
+        db (DatabaseManager): Open database manager
+        
+    Returns:
+        int: Number of products with a missing or generic category
+    """
     
     print("🔍 Analyzing Product Categorization")
     print("=" * 50)
     
-    with DatabaseManager() as db:
-        # Get all products
-        products = list(db.products.find({}))
-        
-        if not products:
-            print("❌ No products found in database!")
-            return
-        
-        print(f"📊 Found {len(products)} products in database")
-        print()
-        
-        # Analyze categories
-        category_counts = Counter()
-        missing_categories = []
-        generic_categories = []
-        product_analysis = []
-        
-        for product in products:
-            url = product.get('url', '')
-            title = product.get('title', '')
-            current_category = product.get('category', '')
-            
-            # Count categories
-            category_counts[current_category] += 1
-            
-            # Find issues
-            if not current_category:
-                missing_categories.append({
-                    'url': url,
-                    'title': title
-                })
-            elif current_category == 'Electronics':
-                generic_categories.append({
-                    'url': url,
+    total_products = db.products.count_documents({})
+    
+    if not total_products:
+        print("❌ No products found in database!")
+        return 0
+    
+    print(f"📊 Found {total_products} products in database")
+    print()
+    
+    # Count categories server-side instead of tallying every document in Python
+    category_counts = Counter()
+    for result in db.products.aggregate(CATEGORY_COUNTS_PIPELINE):
+        category_counts[result['_id'] or ''] += result['count']
+    
+    # Find issues - only the samples that get printed are transferred
+    missing_count = db.products.count_documents(MISSING_CATEGORY_FILTER)
+    missing_categories = list(db.products.find(MISSING_CATEGORY_FILTER, PRODUCT_FIELDS).limit(SAMPLE_SIZE))
+    generic_count = db.products.count_documents(GENERIC_CATEGORY_FILTER)
+    generic_categories = list(db.products.find(GENERIC_CATEGORY_FILTER, PRODUCT_FIELDS).limit(SAMPLE_SIZE))
+    
+    changes_needed = 0
+    change_samples = []
+    # Suggestions for the printed generic samples, filled in by the scan below
+    generic_suggestions = {product.get('url') or '': None for product in generic_categories}
+    
+    # Stream products in batches; the projection is covered by the compound index.
+    # Only a count and the first few suggested changes are kept, not every product
+    cursor = db.products.find({}, PRODUCT_FIELDS).hint(CATEGORY_COVERING_INDEX).batch_size(BATCH_SIZE)
+    for product in cursor:
+        # Covered results report missing fields as null
+        url = product.get('url') or ''
+        title = product.get('title') or ''
+        current_category = product.get('category') or ''
+        
+        # Test with improved logic
+        suggested_category = classify_product_category(url, title)
+        if url in generic_suggestions:
+            generic_suggestions[url] = suggested_category
+        
+        if current_category != suggested_category:
+            changes_needed += 1
+            if len(change_samples) < CHANGE_SAMPLE_SIZE:
+                change_samples.append({
                     'title': title,
-                    'category': current_category
+                    'current_category': current_category,
+                    'suggested_category': suggested_category
                 })
-            
-            # Test with improved logic
-            suggested_category = classify_product_category(url, title)
-            
-            product_analysis.append({
-                'url': url,
-                'title': title,
-                'current_category': current_category,
-                'suggested_category': suggested_category,
-                'needs_change': current_category != suggested_category
-            })
-        
-        # Print analysis results
-        print("📈 Category Distribution:")
-        print("-" * 30)
-        for category, count in category_counts.most_common():
-            category_display = category if category else "[MISSING]"
-            print(f"  {category_display}: {count} products")
-        print()
-        
-        print("⚠️ Issues Found:")
-        print("-" * 20)
-        print(f"  Missing categories: {len(missing_categories)} products")
-        print(f"  Generic 'Electronics': {len(generic_categories)} products")
-        
-        changes_needed = sum(1 for p in product_analysis if p['needs_change'])
-        print(f"  Products needing recategorization: {changes_needed} products")
+    
+    # Print analysis results
+    print("📈 Category Distribution:")
+    print("-" * 30)
+    for category, count in category_counts.most_common():
+        category_display = category if category else "[MISSING]"
+        print(f"  {category_display}: {count} products")
+    print()
+    
+    print("⚠️ Issues Found:")
+    print("-" * 20)
+    print(f"  Missing categories: {missing_count} products")
+    print(f"  Generic 'Electronics': {generic_count} products")
+    print(f"  Products needing recategorization: {changes_needed} products")
+    print()
+    
+    # Show specific examples
+    if missing_categories:
+        print("🚨 Products with Missing Categories:")
+        print("-" * 40)
+        for i, product in enumerate(missing_categories, 1):
+            print(f"  {i}. {product.get('title', '')[:60]}...")
+            print(f"     URL: {product.get('url', '')}")
+        if missing_count > SAMPLE_SIZE:
+            print(f"     ... and {missing_count - SAMPLE_SIZE} more")
         print()
-        
-        # Show specific examples
-        if missing_categories:
-            print("🚨 Products with Missing Categories:")
-            print("-" * 40)
-            for i, product in enumerate(missing_categories[:5], 1):
-                print(f"  {i}. {product['title'][:60]}...")
-                print(f"     URL: {product['url']}")
-            if len(missing_categories) > 5:
-                print(f"     ... and {len(missing_categories) - 5} more")
+    
+    if generic_categories:
+        print("📦 Products with Generic 'Electronics' Category:")
+        print("-" * 50)
+        for i, product in enumerate(generic_categories, 1):
+            # Only classified here if the product changed between the sample query and the scan
+            suggested = (generic_suggestions.get(product.get('url') or '')
+                         or classify_product_category(product.get('url', ''), product.get('title', '')))
+            print(f"  {i}. {product.get('title', '')[:50]}...")
+            print(f"     Current: {product['category']}")
+            print(f"     Suggested: {suggested}")
+            print(f"     URL: {product.get('url', '')}")
             print()
-        
-        if generic_categories:
-            print("📦 Products with Generic 'Electronics' Category:")
-            print("-" * 50)
-            for i, product in enumerate(generic_categories[:5], 1):
-                suggested = classify_product_category(product['url'], product['title'])
-                print(f"  {i}. {product['title'][:50]}...")
-                print(f"     Current: {product['category']}")
-                print(f"     Suggested: {suggested}")
-                print(f"     URL: {product['url']}")
-                print()
-            if len(generic_categories) > 5:
-                print(f"     ... and {len(generic_categories) - 5} more")
-        
-        # Show categorization changes needed
-        if changes_needed > 0:
-            print("🔄 Suggested Categorization Changes:")
-            print("-" * 40)
-            changes = [p for p in product_analysis if p['needs_change']]
-            for i, product in enumerate(changes[:10], 1):
-                print(f"  {i}. {product['title'][:50]}...")
-                print(f"     Current: {product['current_category'] or '[MISSING]'}")
-                print(f"     Suggested: {product['suggested_category']}")
-                print()
-            if len(changes) > 10:
-                print(f"     ... and {len(changes) - 10} more changes needed")
-        
-        # Summary
-        print("📋 Summary:")
-        print("-" * 15)
-        print(f"  Total products: {len(products)}")
-        print(f"  Unique categories: {len(category_counts)}")
-        print(f"  Products with issues: {len(missing_categories) + len(generic_categories)}")
-        print(f"  Improvement potential: {changes_needed} products")
-        
-        accuracy = ((len(products) - changes_needed) / len(products)) * 100
-        print(f"  Current accuracy: {accuracy:.1f}%")
+        if generic_count > SAMPLE_SIZE:
+            print(f"     ... and {generic_count - SAMPLE_SIZE} more")
+    
+    # Show categorization changes needed
+    if changes_needed > 0:
+        print("🔄 Suggested Categorization Changes:")
+        print("-" * 40)
+        for i, product in enumerate(change_samples, 1):
+            print(f"  {i}. {product['title'][:50]}...")
+            print(f"     Current: {product['current_category'] or '[MISSING]'}")
+            print(f"     Suggested: {product['suggested_category']}")
+            print()
+        if changes_needed > CHANGE_SAMPLE_SIZE:
+            print(f"     ... and {changes_needed - CHANGE_SAMPLE_SIZE} more changes needed")
+    
+    # Summary
+    print("📋 Summary:")
+    print("-" * 15)
+    print(f"  Total products: {total_products}")
+    print(f"  Unique categories: {len(category_counts)}")
+    print(f"  Products with issues: {missing_count + generic_count}")
+    print(f"  Improvement potential: {changes_needed} products")
+    
+    accuracy = ((total_products - changes_needed) / total_products) * 100
+    print(f"  Current accuracy: {accuracy:.1f}%")
+    
+    return missing_count + generic_count
 
-def analyze_keyword_patterns():
-    """Analyze what keywords appear in titles but aren't captured"""
+def analyze_keyword_patterns(db, uncategorized_count=None):
+    """
+    Analyze what keywords appear in titles but aren't captured
+    
+    Args:
+        db (DatabaseManager): Open database manager
+        uncategorized_count (int): Products with a missing or generic category,
+            if already known from analyze_categories
+    """
     
     print("\n🔍 Analyzing Keyword Patterns")
     print("=" * 40)
     
-    with DatabaseManager() as db:
-        products = list(db.products.find({}))
-        
-        # Extract common words from titles in generic categories
-        generic_products = [p for p in products if p.get('category') == 'Electronics' or not p.get('category')]
-        
-        if not generic_products:
-            print("✅ No generic categorization issues found!")
-            return
-        
-        word_freq = Counter()
-        
-        for product in generic_products:
-            title = product.get('title', '').lower()
-            # Split into words and count
-            words = title.split()
-            for word in words:
-                # Clean word
-                clean_word = ''.join(c for c in word if c.isalnum())
-                if len(clean_word) > 3:  # Only words longer than 3 chars
-                    word_freq[clean_word] += 1
-        
-        print("🔤 Most common words in uncategorized products:")
-        print("-" * 45)
-        for word, count in word_freq.most_common(20):
-            print(f"  {word}: {count} occurrences")
+    if uncategorized_count is None:
+        uncategorized_count = db.products.count_documents(UNCATEGORIZED_FILTER)
+    
+    if not uncategorized_count:
+        print("✅ No generic categorization issues found!")
+        return
+    
+    # Only the top words come back - titles never leave the server
+    print("🔤 Most common words in uncategorized products:")
+    print("-" * 45)
+    for result in db.products.aggregate(KEYWORD_FREQUENCY_PIPELINE):
+        print(f"  {result['_id']}: {result['count']} occurrences")
 
 if __name__ == "__main__":
     try:
-        analyze_categories()
-        analyze_keyword_patterns()
+        # One connection for both passes; the keyword pass reuses the issue count
+        with DatabaseManager() as db:
+            uncategorized_count = analyze_categories(db)
+            analyze_keyword_patterns(db, uncategorized_count)
         
         print("\n✅ Analysis complete!")
         print("💡 Use this information to improve the categorization logic in helpers.py")
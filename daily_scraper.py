@@ -1,13 +1,15 @@
 """
 Daily scraping orchestrator for Jordan Electronics Scraper
-Runs both Leaders.jo and SmartBuy scrapers in sequence
+Runs both Leaders.jo and SmartBuy scrapers in parallel
 Designed for GitHub Actions automation
 """
 
 import sys
 import os
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 import logging
 
 # Add src directory to Python path for absolute imports
@@ -17,6 +19,14 @@ src_dir = os.path.join(project_root, 'src')
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
+# Maximum concurrent product page fetches per scraper
+MAX_PRODUCT_WORKERS = 4
+
+# Worker processes for parsing product pages outside the GIL (0 = parse in the fetch threads).
+# The daily run only parses a handful of pages, where process start-up outweighs the gain;
+# raise this for large crawls
+PARSE_PROCESSES = 0
+
 def setup_logging():
     """Set up logging for the daily scraping process"""
     # Ensure logs directory exists
@@ -37,13 +47,21 @@ def setup_logging():
     
     return logging.getLogger(__name__)
 
+class ScraperLogAdapter(logging.LoggerAdapter):
+    """Prefix log messages with the scraper name so interleaved parallel output stays readable"""
+    
+    def process(self, msg, kwargs):
+        return f"[{self.extra['scraper']}] {msg}", kwargs
+
 def run_leaders_scraper():
     """Run the Leaders.jo scraper"""
-    logger = logging.getLogger(__name__)
+    logger = ScraperLogAdapter(logging.getLogger(__name__), {'scraper': 'leaders'})
     logger.info("=" * 50)
     logger.info("STARTING LEADERS.JO SCRAPER")
     logger.info("=" * 50)
     
+    # Closed in finally so a failed run still releases the session and log writer
+    scraper = None
     try:
         from scrapers.leaders_scraper import LeadersScraper
         from database.manager import DatabaseManager
@@ -63,19 +81,16 @@ def run_leaders_scraper():
             # Try to find additional products from main page
             try:
                 logger.info("Discovering additional products from main page...")
-                html = scraper.get_page('https://leaders.jo/en/')
+                html = scraper.get_home_page()
                 if html:
-                    soup = scraper.parse_html(html)
-                    product_links = soup.select('a[href*="/product/"]')
-                    
                     additional_products = []
-                    for link in product_links[:3]:  # Get 3 additional products
-                        href = link.get('href')
-                        if href and '/product/' in href and '/product-category/' not in href:
-                            product_url = scraper.build_absolute_url(href)
-                            if product_url not in known_products:
-                                additional_products.append(product_url)
-                                logger.info(f"Found additional product: {product_url}")
+                    seen_products = set(known_products)
+                    # Get 3 additional products - parsing stops once they're found
+                    for product_url in islice(scraper.iter_product_links(html), 3):
+                        if product_url not in seen_products:
+                            seen_products.add(product_url)
+                            additional_products.append(product_url)
+                            logger.info(f"Found additional product: {product_url}")
                     
                     known_products.extend(additional_products)
                     
@@ -84,20 +99,25 @@ def run_leaders_scraper():
             
             logger.info(f"Total products to scrape: {len(known_products)}")
             
-            # Scrape each product
-            for i, product_url in enumerate(known_products, 1):
+            # Conditional GETs let unchanged product pages come back as 304 Not Modified
+            scraper.validators.update(db.get_http_validators(known_products))
+            
+            # Scrape products concurrently; scraped products are buffered for one bulk save
+            pending_products = []
+            results = scraper.scrape_products(known_products, MAX_PRODUCT_WORKERS, PARSE_PROCESSES)
+            for i, (product_url, product_data, error) in enumerate(results, 1):
                 try:
-                    logger.info(f"Scraping product {i}/{len(known_products)}: {product_url}")
+                    logger.info(f"Scraped product {i}/{len(known_products)}: {product_url}")
                     
-                    product_data = scraper.scrape_product(product_url)
+                    if error:
+                        raise error
                     
                     if product_data and product_data.get('title'):
-                        if db.save_product(product_data):
-                            products_saved += 1
-                            logger.info(f"✅ Saved: {product_data['title'][:50]}... | Price: {product_data.get('price', 'N/A')}")
-                        else:
-                            errors += 1
-                            logger.error(f"❌ Failed to save product to database")
+                        product_data.update(scraper.validators.get(product_url, {}))
+                        pending_products.append(product_data)
+                        logger.info(f"✅ Scraped: {product_data['title'][:50]}... | Price: {product_data.get('price', 'N/A')}")
+                    elif product_url in scraper.unchanged_urls:
+                        logger.info("⏭️ Unchanged since last scrape")
                     else:
                         errors += 1
                         logger.error(f"❌ Failed to scrape product data")
@@ -106,30 +126,41 @@ def run_leaders_scraper():
                     errors += 1
                     logger.error(f"❌ Error with product {product_url}: {e}")
             
+            # Save all scraped products in one bulk write
+            products_saved = db.save_products(pending_products)
+            if products_saved < len(pending_products):
+                errors += len(pending_products) - products_saved
+                logger.error(f"❌ Failed to save {len(pending_products) - products_saved} products to database")
+            
             # Log the session
-            status = "success" if products_saved > 0 else "failed"
+            status = "success" if products_saved > 0 or scraper.unchanged_urls else "failed"
             db.log_scraping_session(
                 website="Leaders Center Jordan",
                 status=status,
                 products_count=products_saved,
-                notes=f"Daily automated scraping: {len(known_products)} URLs, {errors} errors"
+                notes=f"Daily automated scraping: {len(known_products)} URLs, {len(scraper.unchanged_urls)} unchanged, {errors} errors"
             )
             
-        logger.info(f"Leaders.jo scraping completed: {products_saved} products saved, {errors} errors")
-        return {"success": products_saved > 0, "products": products_saved, "errors": errors}
+        logger.info(f"Leaders.jo scraping completed: {products_saved} products saved, {len(scraper.unchanged_urls)} unchanged, {errors} errors")
+        return {"success": products_saved > 0 or bool(scraper.unchanged_urls), "products": products_saved, "errors": errors}
         
     except Exception as e:
         logger.error(f"Fatal error in Leaders scraper: {e}")
         logger.error(traceback.format_exc())
         return {"success": False, "products": 0, "errors": 1, "fatal_error": str(e)}
+    finally:
+        if scraper is not None:
+            scraper.close()
 
 def run_smartbuy_scraper():
     """Run the SmartBuy Jordan scraper"""
-    logger = logging.getLogger(__name__)
+    logger = ScraperLogAdapter(logging.getLogger(__name__), {'scraper': 'smartbuy'})
     logger.info("=" * 50)
     logger.info("STARTING SMARTBUY JORDAN SCRAPER")
     logger.info("=" * 50)
     
+    # Closed in finally so a failed run still releases the session and log writer
+    scraper = None
     try:
         from scrapers.smartbuy_scraper import SmartBuyScraper
         from database.manager import DatabaseManager
@@ -145,14 +176,17 @@ def run_smartbuy_scraper():
             test_product_url = "https://smartbuy-me.com/products/gts0803st0027"
             logger.info(f"Testing known product: {test_product_url}")
             
+            # Scraped products are buffered and saved in one bulk write at the end
+            pending_products = []
+            
+            scraper.validators.update(db.get_http_validators([test_product_url]))
             test_product = scraper.scrape_product(test_product_url)
             if test_product and test_product.get('title'):
-                if db.save_product(test_product):
-                    products_saved += 1
-                    logger.info(f"✅ Test product saved: {test_product['title'][:50]}...")
-                else:
-                    errors += 1
-                    logger.error("❌ Failed to save test product")
+                test_product.update(scraper.validators.get(test_product_url, {}))
+                pending_products.append(test_product)
+                logger.info(f"✅ Test product scraped: {test_product['title'][:50]}...")
+            elif test_product_url in scraper.unchanged_urls:
+                logger.info("⏭️ Test product unchanged since last scrape")
             else:
                 errors += 1
                 logger.error("❌ Failed to scrape test product")
@@ -175,19 +209,21 @@ def run_smartbuy_scraper():
                             if product_urls:
                                 logger.info(f"Found {len(product_urls)} products in {category_name}")
                                 
-                                for product_url in product_urls:
+                                scraper.validators.update(db.get_http_validators(product_urls))
+                                results = scraper.scrape_products(product_urls, MAX_PRODUCT_WORKERS, PARSE_PROCESSES)
+                                for product_url, product_data, error in results:
                                     try:
-                                        logger.info(f"Scraping: {product_url}")
+                                        logger.info(f"Scraped: {product_url}")
                                         
-                                        product_data = scraper.scrape_product(product_url)
+                                        if error:
+                                            raise error
                                         
                                         if product_data and product_data.get('title'):
-                                            if db.save_product(product_data):
-                                                products_saved += 1
-                                                logger.info(f"✅ Saved: {product_data['title'][:50]}... | Price: {product_data.get('price', 'N/A')}")
-                                            else:
-                                                errors += 1
-                                                logger.error("❌ Failed to save product")
+                                            product_data.update(scraper.validators.get(product_url, {}))
+                                            pending_products.append(product_data)
+                                            logger.info(f"✅ Scraped: {product_data['title'][:50]}... | Price: {product_data.get('price', 'N/A')}")
+                                        elif product_url in scraper.unchanged_urls:
+                                            logger.info("⏭️ Unchanged since last scrape")
                                         else:
                                             errors += 1
                                             logger.error("❌ Failed to scrape product data")
@@ -208,22 +244,31 @@ def run_smartbuy_scraper():
                 errors += 1
                 logger.error(f"Error in category processing: {e}")
             
+            # Save all scraped products in one bulk write
+            products_saved = db.save_products(pending_products)
+            if products_saved < len(pending_products):
+                errors += len(pending_products) - products_saved
+                logger.error(f"❌ Failed to save {len(pending_products) - products_saved} products to database")
+            
             # Log the session
-            status = "success" if products_saved > 0 else "failed"
+            status = "success" if products_saved > 0 or scraper.unchanged_urls else "failed"
             db.log_scraping_session(
                 website="SmartBuy Jordan",
                 status=status,
                 products_count=products_saved,
-                notes=f"Daily automated scraping: {errors} errors"
+                notes=f"Daily automated scraping: {len(scraper.unchanged_urls)} unchanged, {errors} errors"
             )
             
-        logger.info(f"SmartBuy scraping completed: {products_saved} products saved, {errors} errors")
-        return {"success": products_saved > 0, "products": products_saved, "errors": errors}
+        logger.info(f"SmartBuy scraping completed: {products_saved} products saved, {len(scraper.unchanged_urls)} unchanged, {errors} errors")
+        return {"success": products_saved > 0 or bool(scraper.unchanged_urls), "products": products_saved, "errors": errors}
         
     except Exception as e:
         logger.error(f"Fatal error in SmartBuy scraper: {e}")
         logger.error(traceback.format_exc())
         return {"success": False, "products": 0, "errors": 1, "fatal_error": str(e)}
+    finally:
+        if scraper is not None:
+            scraper.close()
 
 def main():
     """Main orchestrator function"""
@@ -238,27 +283,25 @@ def main():
     total_errors = 0
     scraper_results = {}
     
-    # Run Leaders.jo scraper
-    try:
-        leaders_result = run_leaders_scraper()
-        scraper_results['leaders'] = leaders_result
-        total_products += leaders_result['products']
-        total_errors += leaders_result['errors']
-    except Exception as e:
-        logger.error(f"Failed to run Leaders scraper: {e}")
-        scraper_results['leaders'] = {"success": False, "products": 0, "errors": 1}
-        total_errors += 1
+    # Run both scrapers in parallel - they are I/O bound against independent hosts
+    scrapers = {
+        'leaders': ('Leaders', run_leaders_scraper),
+        'smartbuy': ('SmartBuy', run_smartbuy_scraper),
+    }
     
-    # Run SmartBuy scraper
-    try:
-        smartbuy_result = run_smartbuy_scraper()
-        scraper_results['smartbuy'] = smartbuy_result
-        total_products += smartbuy_result['products']
-        total_errors += smartbuy_result['errors']
-    except Exception as e:
-        logger.error(f"Failed to run SmartBuy scraper: {e}")
-        scraper_results['smartbuy'] = {"success": False, "products": 0, "errors": 1}
-        total_errors += 1
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+        futures = {key: executor.submit(run) for key, (_, run) in scrapers.items()}
+        
+        for key, future in futures.items():
+            try:
+                result = future.result()
+                scraper_results[key] = result
+                total_products += result['products']
+                total_errors += result['errors']
+            except Exception as e:
+                logger.error(f"Failed to run {scrapers[key][0]} scraper: {e}")
+                scraper_results[key] = {"success": False, "products": 0, "errors": 1}
+                total_errors += 1
     
     # Final summary
     logger.info("=" * 70)
@@ -11,6 +11,25 @@ sys.path.insert(0, src_dir)
 
 from database.manager import DatabaseManager
 
+# Documents fetched per cursor round-trip while streaming products
+BATCH_SIZE = 1000
+
+# Only the fields that get printed are transferred
+DISPLAY_FIELDS = ('title', 'category', 'price', 'source_website', 'url')
+PRODUCT_PROJECTION = {**dict.fromkeys(DISPLAY_FIELDS, 1), '_id': 0}
+
+def write_lines(lines):
+    """
+    Write buffered output lines to stdout in a single call
+    
+    Args:
+        lines (list): Lines to write (cleared afterwards)
+    """
+    if lines:
+        sys.stdout.write('\n'.join(lines))
+        sys.stdout.write('\n')
+        lines.clear()
+
 def examine_products():
     """Examine current products in detail"""
     
@@ -18,15 +37,25 @@ def examine_products():
     print("=" * 40)
     
     with DatabaseManager() as db:
-        products = list(db.products.find({}))
+        products = db.iter_products(projection=PRODUCT_PROJECTION, batch_size=BATCH_SIZE)
         
+        # Buffer output and write it once per batch instead of one print() per line
+        out = []
         for i, product in enumerate(products, 1):
-            print(f"\n📱 Product {i}:")
-            print(f"  Title: {product.get('title', 'N/A')}")
-            print(f"  Category: {product.get('category', 'N/A')}")
-            print(f"  Price: {product.get('price', 'N/A')}")
-            print(f"  Source: {product.get('source_website', 'N/A')}")
-            print(f"  URL: {product.get('url', 'N/A')}")
+            title, category, price, source, url = (product.get(field, 'N/A') for field in DISPLAY_FIELDS)
+            out.append(
+                f"\n📱 Product {i}:\n"
+                f"  Title: {title}\n"
+                f"  Category: {category}\n"
+                f"  Price: {price}\n"
+                f"  Source: {source}\n"
+                f"  URL: {url}"
+            )
+            
+            if i % BATCH_SIZE == 0:
+                write_lines(out)
+        
+        write_lines(out)
 
 if __name__ == "__main__":
     examine_products()
\ No newline at end of file
@@ -1,9 +1,11 @@
 """
 Script to recategorize existing products in database with improved logic
 This will update any products that might be better categorized with the new algorithm
+By default only products with a missing or generic category are checked; pass --all to recheck every product
 """
 import sys
 import os
+from pymongo import UpdateOne
 
 # Add src to path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,24 +15,85 @@ sys.path.insert(0, src_dir)
 from database.manager import DatabaseManager
 from utils.helpers import classify_product_category
 
-def recategorize_products():
-    """Update categories of existing products with improved logic"""
+# Documents fetched per cursor round-trip while streaming products
+BATCH_SIZE = 1000
+
+# Products whose category is missing or generic - the ones likely to change
+CANDIDATE_FILTER = {'category': {'$in': [None, '', 'Electronics']}}
+
+# Category updates sent to MongoDB per bulk_write call
+UPDATE_BATCH_SIZE = 1000
+
+def write_lines(lines):
+    """
+    Write buffered output lines to stdout in a single call
+    
+    Args:
+        lines (list): Lines to write (cleared afterwards)
+    """
+    if lines:
+        sys.stdout.write('\n'.join(lines))
+        sys.stdout.write('\n')
+        lines.clear()
+
+def flush_updates(db, pending_updates):
+    """
+    Send queued category updates to MongoDB in a single bulk_write
+    
+    Args:
+        db (DatabaseManager): Open database manager
+        pending_updates (list): UpdateOne operations to apply (cleared afterwards)
+        
+    Returns:
+        int: Number of products modified
+    """
+    if not pending_updates:
+        return 0
+    
+    try:
+        result = db.products.bulk_write(pending_updates, ordered=False)
+        print(f"    ✅ Applied {result.modified_count}/{len(pending_updates)} category updates")
+        return result.modified_count
+    except Exception as e:
+        print(f"    ❌ Error updating batch of {len(pending_updates)} products: {e}")
+        return 0
+    finally:
+        pending_updates.clear()
+
+def recategorize_products(only_generic=True):
+    """
+    Update categories of existing products with improved logic
+    
+    Args:
+        only_generic (bool): Only check products with a missing or generic category
+    """
     
     print("🔄 Recategorizing Existing Products")
     print("=" * 40)
     
     with DatabaseManager() as db:
-        products = list(db.products.find({}))
+        total_products = db.products.count_documents({})
         
-        if not products:
+        if not total_products:
             print("❌ No products found in database!")
             return
         
-        print(f"📊 Found {len(products)} products")
+        print(f"📊 Found {total_products} products")
         print()
         
         updated_count = 0
+        pending_updates = []
         
+        # Let the server skip products that already have a specific category
+        candidate_filter = CANDIDATE_FILTER if only_generic else {}
+        if only_generic:
+            print(f"🔎 Checking {db.products.count_documents(candidate_filter)} products with missing or generic categories")
+            print()
+        
+        products = db.iter_products(candidate_filter, {'url': 1, 'title': 1, 'category': 1}, BATCH_SIZE)
+        
+        # Per-product output is buffered and written once per batch instead of one print() per line
+        out = []
         for i, product in enumerate(products, 1):
             url = product.get('url', '')
             title = product.get('title', '')
@@ -40,33 +103,30 @@ def recategorize_products():
             new_category = classify_product_category(url, title)
             
             if current_category != new_category:
-                print(f"🔄 Product {i}: {title}")
-                print(f"    Current: {current_category}")
-                print(f"    New: {new_category}")
+                out.append(f"🔄 Product {i}: {title}")
+                out.append(f"    Current: {current_category}")
+                out.append(f"    New: {new_category}")
                 
-                # Update in database
-                try:
-                    result = db.products.update_one(
-                        {'url': url},
-                        {'$set': {'category': new_category}}
-                    )
-                    
-                    if result.modified_count > 0:
-                        updated_count += 1
-                        print(f"    ✅ Updated successfully")
-                    else:
-                        print(f"    ❌ Update failed")
-                        
-                except Exception as e:
-                    print(f"    ❌ Error updating: {e}")
-                print()
+                # Queue update - sent to the database in batches (url is uniquely indexed)
+                pending_updates.append(UpdateOne({'url': url}, {'$set': {'category': new_category}}))
+                if len(pending_updates) >= UPDATE_BATCH_SIZE:
+                    write_lines(out)
+                    updated_count += flush_updates(db, pending_updates)
+                out.append('')
             else:
-                print(f"✅ Product {i}: {title} - Category unchanged ({current_category})")
+                out.append(f"✅ Product {i}: {title} - Category unchanged ({current_category})")
+            
+            if len(out) >= BATCH_SIZE:
+                write_lines(out)
+        
+        # Apply any remaining queued updates
+        write_lines(out)
+        updated_count += flush_updates(db, pending_updates)
         
         print("\n📋 Recategorization Summary:")
-        print(f"  Total products: {len(products)}")
+        print(f"  Total products: {total_products}")
         print(f"  Products updated: {updated_count}")
-        print(f"  Products unchanged: {len(products) - updated_count}")
+        print(f"  Products unchanged: {total_products - updated_count}")
         
         if updated_count > 0:
             print("\n🎉 Database updated with improved categorization!")
@@ -75,7 +135,7 @@ def recategorize_products():
 
 if __name__ == "__main__":
     try:
-        recategorize_products()
+        recategorize_products(only_generic='--all' not in sys.argv)
     except Exception as e:
         print(f"❌ Error during recategorization: {e}")
         import traceback
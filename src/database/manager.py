@@ -2,28 +2,85 @@
 Database manager for handling MongoDB operations
 Shared across all scrapers to eliminate code duplication
 """
+import hashlib
+import json
 import logging
+import threading
 from datetime import datetime, timedelta
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
 
 logger = logging.getLogger(__name__)
 
+# Compound index covering queries that only need category, url and title
+CATEGORY_COVERING_INDEX = [('category', 1), ('url', 1), ('title', 1)]
+
+# Compound index covering per-website listings that only need url and title
+WEBSITE_COVERING_INDEX = [('source_website', 1), ('url', 1), ('title', 1)]
+
+# Projection for listings that only need to identify products - answered from the indexes above
+SUMMARY_PROJECTION = {'url': 1, 'title': 1, '_id': 0}
+
+# Fields left out of the content hash because they change on every scrape
+VOLATILE_FIELDS = {'scraped_at', 'content_hash', '_id'}
+
+# Name of the TTL index that expires old scraping logs
+LOG_TTL_INDEX = 'timestamp_1'
+
+# Server error code for an existing index created with different options
+INDEX_OPTIONS_CONFLICT = 85
+
+# MongoClient options suited to a single scraper process; override via DatabaseManager kwargs
+DEFAULT_CLIENT_OPTIONS = {
+    'maxPoolSize': 50,         # Enough for the concurrent scrapers without idling 100 sockets
+    'maxIdleTimeMS': 300000,   # Drop connections idle for 5 minutes
+    'retryWrites': True,
+    'w': 1,                    # Acknowledge on the primary only - product writes are re-scraped daily
+    'appname': 'jordan-electronics-scraper',
+}
+
+def compute_content_hash(product_data):
+    """
+    Hash the product fields that matter for change detection
+    
+    Args:
+        product_data (dict): Product information
+        
+    Returns:
+        str: Hex digest of the product content, ignoring volatile fields
+    """
+    content = {key: value for key, value in product_data.items() if key not in VOLATILE_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
 class DatabaseManager:
     """Manages MongoDB operations for product data and scraping logs"""
     
-    def __init__(self, connection_string='mongodb://localhost:27017/', database_name='jordan_electronics'):
+    def __init__(self, connection_string='mongodb://localhost:27017/', database_name='jordan_electronics', batch_size=500, log_retention_days=30, **client_options):
         """
         Initialize database connection
         
         Args:
             connection_string (str): MongoDB connection string
             database_name (str): Database name to use
+            batch_size (int): Queued writes that trigger an automatic flush (default: 500)
+            log_retention_days (int): Days scraping logs are kept before MongoDB expires them (default: 30)
+            **client_options: MongoClient options overriding DEFAULT_CLIENT_OPTIONS
+                (e.g. compressors='zstd,zlib' for a remote server)
         """
         self.connection_string = connection_string
         self.database_name = database_name
+        self.batch_size = batch_size
+        self.log_retention_days = log_retention_days
+        
+        # Product upserts and session logs queued for the next bulk write - scrapers
+        # queue from thread pools, so appends and the swap in flush() hold the lock
+        self._pending = []
+        self._pending_logs = []
+        self._pending_lock = threading.Lock()
         
         # Initialize connection
-        self.client = MongoClient(connection_string)
+        self.client = MongoClient(connection_string, **{**DEFAULT_CLIENT_OPTIONS, **client_options})
         self.db = self.client[database_name]
         self.products = self.db['products']
         self.logs = self.db['scraping_logs']
@@ -48,88 +105,237 @@ class DatabaseManager:
             # Create index on source_website
             self.products.create_index('source_website')
             
+            # Covering index so category analysis can be answered from the index alone
+            self.products.create_index(CATEGORY_COVERING_INDEX)
+            self.products.create_index(WEBSITE_COVERING_INDEX)
+            
             logger.info("Database indexes created successfully")
         except Exception as e:
             logger.warning(f"Index creation warning (might already exist): {e}")
+        
+        # Let MongoDB expire old scraping logs in the background
+        try:
+            self.logs.create_index('timestamp', name=LOG_TTL_INDEX, expireAfterSeconds=self.log_retention_days * 86400)
+        except OperationFailure as e:
+            if e.code == INDEX_OPTIONS_CONFLICT:
+                # Index exists with another retention period - update it in place
+                self.set_log_retention(self.log_retention_days)
+            else:
+                logger.warning(f"Log TTL index warning: {e}")
+        except Exception as e:
+            logger.warning(f"Log TTL index warning: {e}")
+    
+    def _build_upsert(self, product_data):
+        """
+        Build the upsert operation for a product
+        
+        Args:
+            product_data (dict): Product information to save
+            
+        Returns:
+            UpdateOne or None: Upsert keyed on URL, None if required fields are missing
+        """
+        url = product_data.get('url')
+        if not url or not product_data.get('title'):
+            logger.error("Product data missing required fields (url or title)")
+            return None
+        
+        content_hash = compute_content_hash(product_data)
+        
+        # Content fields only take the new values when the stored hash differs. An unchanged
+        # product keeps its stored values, so its update only changes scraped_at - the
+        # document is still updated and journaled, just without touching the content fields.
+        # $literal stops values such as '$20' being read as field paths
+        unchanged = {'$eq': ['$content_hash', content_hash]}
+        fields = {
+            key: {'$cond': [unchanged, f'${key}', {'$literal': value}]}
+            for key, value in product_data.items() if key not in VOLATILE_FIELDS
+        }
+        fields['content_hash'] = content_hash
+        if 'scraped_at' in product_data:
+            fields['scraped_at'] = {'$literal': product_data['scraped_at']}
+        
+        # Use upsert to avoid duplicates based on URL
+        return UpdateOne(
+            {'url': url},       # Filter
+            [{'$set': fields}], # Update pipeline
+            upsert=True         # Insert if not exists
+        )
     
     def save_product(self, product_data):
         """
-        Save or update product in database
+        Queue a product to be saved or updated in the next bulk write
         
         Args:
             product_data (dict): Product information to save
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if queued (not yet written - see flush), False if the product is invalid
         """
-        try:
-            # Validate required fields
-            if not product_data.get('url') or not product_data.get('title'):
-                logger.error("Product data missing required fields (url or title)")
-                return False
+        operation = self._build_upsert(product_data)
+        if operation is None:
+            return False
+        
+        with self._pending_lock:
+            self._pending.append(operation)
+            batch_full = len(self._pending) >= self.batch_size
+        # Lazy formatting - skipped entirely when INFO is filtered out
+        logger.info("Product queued: %s", product_data['title'])
+        
+        if batch_full:
+            self.flush()
+        return True
+    
+    def save_products(self, products_data):
+        """
+        Save or update multiple products with a single bulk write
+        
+        Args:
+            products_data (list): Product dictionaries to save
             
-            # Use upsert to avoid duplicates based on URL
-            result = self.products.update_one(
-                {'url': product_data['url']},  # Filter
-                {'$set': product_data},        # Update
-                upsert=True                    # Insert if not exists
-            )
+        Returns:
+            int: Number of products inserted or updated
+        """
+        # Keep writes in order with anything queued through save_product
+        self.flush()
+        
+        operations = [op for op in map(self._build_upsert, products_data) if op is not None]
+        return self._bulk_upsert(operations)
+    
+    def flush(self):
+        """
+        Write all queued product upserts and session logs to the database
+        A bulk write in which no queued product could be written raises BulkWriteError
+        instead of being logged, so queued saves never fail silently
+        
+        Returns:
+            int: Number of queued products inserted or updated
+        """
+        with self._pending_lock:
+            operations, self._pending = self._pending, []
+            log_entries, self._pending_logs = self._pending_logs, []
+        
+        saved = self._bulk_upsert(operations, raise_if_none_saved=True)
+        
+        if log_entries:
+            try:
+                self.logs.insert_many(log_entries, ordered=False)
+                logger.info(f"Logged {len(log_entries)} scraping sessions")
+            except Exception as e:
+                logger.error(f"Failed to log sessions: {e}")
+        
+        return saved
+    
+    def _bulk_upsert(self, operations, raise_if_none_saved=False):
+        """
+        Apply product upserts in a single unordered bulk write
+        
+        Args:
+            operations (list): UpdateOne operations to apply
+            raise_if_none_saved (bool): Re-raise BulkWriteError when no operation succeeded
             
-            if result.upserted_id:
-                logger.info(f"New product saved: {product_data['title']}")
-                return True
-            else:
-                logger.info(f"Product updated: {product_data['title']}")
-                return True
-                
+        Returns:
+            int: Number of products inserted or matched (unchanged ones only get a fresh scraped_at)
+        """
+        if not operations:
+            return 0
+        
+        try:
+            result = self.products.bulk_write(operations, ordered=False)
+            logger.info(f"Bulk saved products: {result.upserted_count} new, {result.matched_count} updated")
+            return result.upserted_count + result.matched_count
+            
+        except BulkWriteError as e:
+            details = e.details
+            saved = details.get('nUpserted', 0) + details.get('nMatched', 0)
+            logger.error(f"Bulk save partially failed: {len(details.get('writeErrors', []))} errors, {saved} saved")
+            if raise_if_none_saved and not saved:
+                raise
+            return saved
         except Exception as e:
-            logger.error(f"Failed to save product: {e}")
-            return False
+            logger.error(f"Failed to save products: {e}")
+            return 0
     
-    def get_product_by_url(self, url):
+    def get_product_by_url(self, url, projection=None):
         """
         Get product by URL
         
         Args:
             url (str): Product URL to search for
+            projection (dict, optional): Fields to return (default: whole document)
             
         Returns:
             dict or None: Product data if found, None otherwise
         """
+        self.flush()
+        
         try:
-            return self.products.find_one({'url': url})
+            return self.products.find_one({'url': url}, projection)
         except Exception as e:
             logger.error(f"Failed to get product by URL: {e}")
             return None
     
-    def get_products_by_category(self, category):
+    def get_http_validators(self, urls):
+        """
+        Get stored HTTP cache validators for the given product URLs
+        
+        Args:
+            urls (list): Product URLs to look up
+            
+        Returns:
+            dict: URL -> {'etag': ..., 'last_modified': ...} for products that have them
+        """
+        self.flush()
+        
+        try:
+            cursor = self.products.find(
+                {'url': {'$in': list(urls)}, '$or': [{'etag': {'$ne': None}}, {'last_modified': {'$ne': None}}]},
+                {'url': 1, 'etag': 1, 'last_modified': 1, '_id': 0}
+            )
+            return {
+                product['url']: {'etag': product.get('etag'), 'last_modified': product.get('last_modified')}
+                for product in cursor
+            }
+        except Exception as e:
+            logger.error(f"Failed to get HTTP validators: {e}")
+            return {}
+    
+    def get_products_by_category(self, category, projection=None):
         """
         Get all products in a specific category
         
         Args:
             category (str): Category to filter by
+            projection (dict, optional): Fields to return (default: whole documents);
+                SUMMARY_PROJECTION is answered from the index alone
             
         Returns:
             list: List of products in the category
         """
+        self.flush()
+        
         try:
-            return list(self.products.find({'category': category}))
+            return list(self.products.find({'category': category}, projection))
         except Exception as e:
             logger.error(f"Failed to get products by category: {e}")
             return []
     
-    def get_products_by_website(self, website):
+    def get_products_by_website(self, website, projection=None):
         """
         Get all products from a specific website
         
         Args:
             website (str): Source website to filter by
+            projection (dict, optional): Fields to return (default: whole documents);
+                SUMMARY_PROJECTION is answered from the index alone
             
         Returns:
             list: List of products from the website
         """
+        self.flush()
+        
         try:
-            return list(self.products.find({'source_website': website}))
+            return list(self.products.find({'source_website': website}, projection))
         except Exception as e:
             logger.error(f"Failed to get products by website: {e}")
             return []
@@ -144,6 +350,8 @@ class DatabaseManager:
         Returns:
             list: List of all products
         """
+        self.flush()
+        
         try:
             cursor = self.products.find()
             if limit:
@@ -153,6 +361,25 @@ class DatabaseManager:
             logger.error(f"Failed to get all products: {e}")
             return []
     
+    def iter_products(self, filter_dict=None, projection=None, batch_size=1000):
+        """
+        Stream products from the database without loading them all into memory
+        
+        Args:
+            filter_dict (dict, optional): Filter criteria
+            projection (dict, optional): Fields to return
+            batch_size (int): Documents fetched per cursor round-trip
+            
+        Yields:
+            dict: Products matching the filter
+        """
+        self.flush()
+        
+        try:
+            yield from self.products.find(filter_dict or {}, projection).batch_size(batch_size)
+        except Exception as e:
+            logger.error(f"Failed to stream products: {e}")
+    
     def count_products(self, filter_dict=None):
         """
         Count products in database
@@ -163,6 +390,8 @@ class DatabaseManager:
         Returns:
             int: Number of products matching criteria
         """
+        self.flush()
+        
         try:
             if filter_dict:
                 return self.products.count_documents(filter_dict)
@@ -181,6 +410,8 @@ class DatabaseManager:
         Returns:
             bool: True if deleted, False otherwise
         """
+        self.flush()
+        
         try:
             result = self.products.delete_one({'url': url})
             if result.deleted_count > 0:
@@ -204,7 +435,7 @@ class DatabaseManager:
             notes (str): Additional notes about the session
             
         Returns:
-            bool: True if logged successfully, False otherwise
+            bool: True if queued (written on the next flush), False otherwise
         """
         try:
             log_entry = {
@@ -216,13 +447,19 @@ class DatabaseManager:
                 'scraper_version': '2.0'  # Track version for future compatibility
             }
             
-            self.logs.insert_one(log_entry)
-            logger.info(f"Logged scraping session for {website}")
-            return True
+            # Written together with queued products on the next flush
+            with self._pending_lock:
+                self._pending_logs.append(log_entry)
+                batch_full = len(self._pending_logs) >= self.batch_size
+            logger.info(f"Queued scraping session log for {website}")
             
         except Exception as e:
             logger.error(f"Failed to log session: {e}")
             return False
+        
+        if batch_full:
+            self.flush()
+        return True
     
     def get_scraping_logs(self, website=None, limit=10):
         """
@@ -235,6 +472,8 @@ class DatabaseManager:
         Returns:
             list: List of log entries
         """
+        self.flush()
+        
         try:
             filter_dict = {'website': website} if website else {}
             return list(self.logs.find(filter_dict).sort('timestamp', -1).limit(limit))
@@ -261,6 +500,30 @@ class DatabaseManager:
             logger.error(f"Failed to cleanup old logs: {e}")
             return 0
     
+    def set_log_retention(self, days):
+        """
+        Change how long the TTL index keeps scraping logs
+        Expired logs are removed by MongoDB's TTL monitor in the background;
+        this rewrites the index for every client of the database
+        
+        Args:
+            days (int): Number of days of logs to retain
+            
+        Returns:
+            bool: True if the retention period was updated, False otherwise
+        """
+        try:
+            self.db.command('collMod', self.logs.name, index={
+                'name': LOG_TTL_INDEX,
+                'expireAfterSeconds': days * 86400
+            })
+            self.log_retention_days = days
+            logger.info(f"Scraping logs now expire after {days} days")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to update log retention: {e}")
+            return False
+    
     def get_database_stats(self):
         """
         Get database statistics
@@ -268,21 +531,35 @@ class DatabaseManager:
         Returns:
             dict: Database statistics
         """
+        self.flush()
+        
         try:
             stats = {
-                'total_products': self.count_products(),
+                'total_products': 0,
                 'products_by_category': {},
                 'products_by_website': {},
                 'total_logs': self.logs.count_documents({})
             }
             
-            # Get category breakdown
-            pipeline = [{'$group': {'_id': '$category', 'count': {'$sum': 1}}}]
+            # Get category breakdown - sorting and projecting on the indexed field
+            # lets the group run over the category index without fetching documents
+            pipeline = [
+                {'$sort': {'category': 1}},
+                {'$project': {'_id': 0, 'category': 1}},
+                {'$group': {'_id': '$category', 'count': {'$sum': 1}}}
+            ]
             for result in self.products.aggregate(pipeline):
                 stats['products_by_category'][result['_id']] = result['count']
             
+            # Every product falls in exactly one category group, so the total needs no separate count
+            stats['total_products'] = sum(stats['products_by_category'].values())
+            
             # Get website breakdown
-            pipeline = [{'$group': {'_id': '$source_website', 'count': {'$sum': 1}}}]
+            pipeline = [
+                {'$sort': {'source_website': 1}},
+                {'$project': {'_id': 0, 'source_website': 1}},
+                {'$group': {'_id': '$source_website', 'count': {'$sum': 1}}}
+            ]
             for result in self.products.aggregate(pipeline):
                 stats['products_by_website'][result['_id']] = result['count']
             
@@ -293,12 +570,15 @@ class DatabaseManager:
             return {}
     
     def close(self):
-        """Close database connection"""
+        """Flush queued writes and close database connection - a failed flush still raises"""
         try:
-            self.client.close()
-            logger.info("Database connection closed")
-        except Exception as e:
-            logger.error(f"Error closing database connection: {e}")
+            self.flush()
+        finally:
+            try:
+                self.client.close()
+                logger.info("Database connection closed")
+            except Exception as e:
+                logger.error(f"Error closing database connection: {e}")
     
     def __enter__(self):
         """Context manager entry"""
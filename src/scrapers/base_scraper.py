@@ -3,63 +3,270 @@ Base scraper class containing shared functionality for all site scrapers.
 This implements the hybrid approach with common methods and utilities.
 """
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+import atexit
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+import gzip
+import io
+import json
+import queue
+import threading
 import time
 from urllib.parse import urljoin, urlparse
 import logging
-from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
 import os
 
+from utils.helpers import BloomFilter, KeywordGroupMatcher, extract_currency_from_price, url_visit_key
+
+# Prefer the C-based lxml parser; fall back to the pure-Python one if it isn't installed
+try:
+    from lxml import etree
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Raw lxml trees queried with compiled CSS selectors keep product parsing in C
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+# Optional on-disk HTTP cache so development reruns don't re-download the same pages
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# Seconds a page stays in the development HTTP cache
+HTTP_CACHE_EXPIRY = 3600
+
+# Larger pages (galleries, file downloads, JSON dumps) are skipped before their body is downloaded
+MAX_PAGE_BYTES = 5_000_000
+
+# Streamed bodies are read in chunks of this size while checking MAX_PAGE_BYTES
+PAGE_CHUNK_BYTES = 64 * 1024
+
+# Category keywords checked against the URL and title, in priority order
+DYNAMIC_CATEGORY_KEYWORDS = {
+    'Mobile Phones': ['phone', 'mobile', 'smartphone', 'iphone', 'samsung', 'oppo', 'huawei'],
+    'Computers & Laptops': ['laptop', 'computer', 'pc', 'macbook', 'notebook'],
+    'Wearables': ['watch', 'smartwatch', 'fitness', 'tracker'],
+    'TVs & Monitors': ['tv', 'television', 'monitor', 'display', 'screen'],
+    'Audio & Sound': ['audio', 'speaker', 'headphone', 'earphone', 'sound'],
+    'Cameras & Photography': ['camera', 'photo', 'video', 'lens'],
+    'Gaming': ['gaming', 'game', 'console', 'playstation', 'xbox'],
+    'Home Appliances': ['washing', 'dryer', 'refrigerator', 'appliance', 'washer'],
+    'Personal Care': ['shaver', 'epilator', 'grooming', 'personal care'],
+}
+
+# Matcher for the keywords above, built once at import
+_DYNAMIC_CATEGORY_MATCHER = KeywordGroupMatcher(DYNAMIC_CATEGORY_KEYWORDS)
+
+# Background log writers per logger name, with the process that started them and
+# the number of open scrapers sharing them - a forked worker process has to start
+# its own, since threads aren't inherited
+_LOG_LISTENERS = {}
+_LOG_LISTENERS_LOCK = threading.Lock()
+
+@lru_cache(maxsize=8192)
+def _parsed(url):
+    """Parse a URL once - the same URLs are parsed for throttling and source detection"""
+    return urlparse(url)
+
+@lru_cache(maxsize=4096)
+def _join_url(base_url, relative_url):
+    """Resolve a relative link once - nav menus repeat the same hrefs on every page"""
+    return urljoin(base_url, relative_url)
+
+@lru_cache(maxsize=512)
+def _css(selector):
+    """
+    Compile a CSS selector once to an lxml XPath query for its first match only
+    
+    Wrapping the translated path in (...)[1] keeps lxml from building a list of
+    every matching element when only the first is used
+    """
+    return lxml.etree.XPath(f'({CSSSelector(selector).path})[1]')
+
+@lru_cache(maxsize=512)
+def _css_all(selector):
+    """Compile a CSS selector once to an lxml query for all matches"""
+    return CSSSelector(selector)
+
+# Parse-only scrapers reused by parse_product_in_worker, one per class per worker process
+_WORKER_PARSERS = {}
+
+def parse_product_in_worker(scraper_class, base_url, html, product_url):
+    """
+    Parse a product page in a worker process
+    
+    Args:
+        scraper_class (type): BaseScraper subclass whose parse_product is used
+        base_url (str): Base URL of the scraper that fetched the page
+        html (str): Raw HTML of the product page
+        product_url (str): Product URL
+        
+    Returns:
+        dict: Product data
+    """
+    parser = _WORKER_PARSERS.get(scraper_class)
+    if parser is None:
+        parser = _WORKER_PARSERS[scraper_class] = scraper_class.parser_only(base_url)
+    return parser.parse_product(html, product_url)
+
 class BaseScraper:
     """Base scraper class with shared functionality for all site scrapers"""
     
-    def __init__(self, base_url, delay=2):
+    def __init__(self, base_url, delay=2, pool_size=8, url_filter_capacity=None, max_requests_per_host=2,
+                 http_cache=None, debug_html=False):
         """
         Initialize base scraper with common settings
         
         Args:
             base_url (str): Base URL of the website to scrape
             delay (int): Delay in seconds between requests (default: 2)
+            pool_size (int): Keep-alive connections kept per host (default: 8)
+            url_filter_capacity (int, optional): Track scraped URLs in a Bloom filter sized
+                for this many URLs instead of a set - for large crawls, at the cost of
+                rarely skipping an unscraped URL
+            max_requests_per_host (int): Requests to one host allowed in flight at once (default: 2)
+            http_cache (str, optional): SQLite cache name for development runs - pages fetched
+                within HTTP_CACHE_EXPIRY are served from disk without waiting for the rate limit
+                (requires requests-cache; leave unset in production)
+            debug_html (bool): Log the HTML of unexpected non-200 success responses (default: False)
         """
         self.base_url = base_url
-        self.session = requests.Session()
+        # Scheme and host of base_url - root-relative links just get this prepended
+        parsed_base = urlparse(base_url)
+        self.base_origin = f"{parsed_base.scheme}://{parsed_base.netloc}"
+        self.http_cache = http_cache if requests_cache is not None else None
+        if self.http_cache:
+            self.session = requests_cache.CachedSession(http_cache, backend='sqlite', expire_after=HTTP_CACHE_EXPIRY)
+        else:
+            self.session = requests.Session()
         self.delay = delay
-        self.scraped_urls = set()
+        self.scraped_urls = BloomFilter(capacity=url_filter_capacity) if url_filter_capacity else set()
+        
+        # HTTP cache validators per URL ({'etag': ..., 'last_modified': ...}) used for
+        # conditional GETs, and URLs the server reported as not modified this run
+        self.validators = {}
+        self.unchanged_urls = set()
+        
+        # Home page HTML, fetched once and shared by category and product discovery
+        self._home_html = None
+        
+        # Earliest start time of the next request per host, so concurrent fetches
+        # overlap their network time while request starts stay `delay` apart
+        self._next_fetch = {}
+        self._throttle_lock = threading.Lock()
+        
+        # Caps in-flight requests per host, so slow responses can't pile up
+        # concurrent requests on one site even though starts are spaced
+        self.max_requests_per_host = max_requests_per_host
+        self._host_slots = {}
+        
+        # Debug HTML log, opened on first use and shared by all fetches
+        self.debug_html = debug_html
+        self._debug_file = None
+        self._debug_lock = threading.Lock()
+        
+        # Reuse pooled keep-alive connections across requests and retry transient failures,
+        # including throttling/gateway responses (honouring Retry-After) so a busy
+        # server doesn't cost a fresh connection and a lost product
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504))
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Set up common headers
         self.session.headers.update({
             'User-Agent': 'Jordan Electronics Research Bot/1.0 (+research@example.com)',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9,ar;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
+            # Includes brotli (and zstd) when a decoder is installed - smaller transfers from CDNs
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         })
         
         # Set up logger for this scraper
         self.logger = self._setup_logger()
+        self._logger_released = False
+        
+        if http_cache and not self.http_cache:
+            self.logger.warning("requests-cache is not installed - HTTP cache disabled")
+    
+    @classmethod
+    def parser_only(cls, base_url):
+        """
+        Create an instance that can only parse pages, for use in worker processes
+        Skips __init__, so there is no HTTP session, and its logger has no handlers of
+        its own and doesn't propagate - forked workers never write to the parent's log
+        file or queue (warnings and errors still reach stderr via logging's last resort)
+        
+        Args:
+            base_url (str): Base URL of the website the pages come from
+            
+        Returns:
+            BaseScraper: Instance with just the state parse_product needs
+        """
+        parser = cls.__new__(cls)
+        parser.base_url = base_url
+        parsed_base = urlparse(base_url)
+        parser.base_origin = f"{parsed_base.scheme}://{parsed_base.netloc}"
+        parser.debug_html = False
+        parser.logger = logging.getLogger(f"{cls.__name__.lower()}.worker")
+        parser.logger.propagate = False
+        return parser
     
     def _setup_logger(self):
-        """Set up logger for this scraper instance"""
+        """
+        Set up logger for this scraper instance
+        Records are queued and written to the file and console on a background
+        thread, so fetch threads never wait on log I/O
+        """
         logger_name = f"{self.__class__.__name__.lower()}"
         logger = logging.getLogger(logger_name)
         
-        # Avoid duplicate handlers
-        if not logger.handlers:
+        with _LOG_LISTENERS_LOCK:
+            # Avoid duplicate handlers
+            started = _LOG_LISTENERS.get(logger_name)
+            if started and started[0] == os.getpid():
+                pid, listener, users = started
+                _LOG_LISTENERS[logger_name] = (pid, listener, users + 1)
+                return logger
+            
             logger.setLevel(logging.INFO)
+            logger.handlers.clear()
             
             # Create formatter
             formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             
-            # File handler
+            # File handler - rotated so long crawls don't grow one file forever
             os.makedirs('logs', exist_ok=True)
-            file_handler = logging.FileHandler(f'logs/{logger_name}.log')
+            file_handler = RotatingFileHandler(f'logs/{logger_name}.log', maxBytes=50_000_000, backupCount=5)
             file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
             
             # Console handler
             console_handler = logging.StreamHandler()
             console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+            
+            log_queue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, file_handler, console_handler)
+            listener.start()
+            atexit.register(listener.stop)  # Drain queued records on exit
+            
+            logger.addHandler(QueueHandler(log_queue))
+            _LOG_LISTENERS[logger_name] = (os.getpid(), listener, 1)
         
         return logger
     
@@ -71,45 +278,238 @@ class BaseScraper:
             url (str): URL to fetch
             
         Returns:
-            str: HTML content or None if failed
+            str: HTML content or None if failed or not modified since the last scrape
         """
-        if url in self.scraped_urls:
-            self.logger.info(f"Already scraped: {url}")
+        # Fragments and tracking parameters don't change the page
+        visit_key = url_visit_key(url)
+        if visit_key in self.scraped_urls:
+            self.logger.info("Already scraped: %s", url)
             return None
             
         try:
-            self.logger.info(f"Fetching: {url}")
+            self.logger.debug("Fetching: %s", url)
             
-            # Rate limiting
-            time.sleep(self.delay)
+            # Ask the server to skip the body if the page hasn't changed since the last scrape
+            headers = {}
+            validators = self.validators.get(url, {})
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
             
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            with self._host_slot(url):
+                # Rate limiting - cached pages never reach the server
+                if not self._is_cached(url):
+                    self._wait_for_turn(url)
+                # Streamed - the request returns once headers arrive, so the body can be skipped
+                with self.session.get(url, headers=headers, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    body = self._read_page_body(response)
             
-            self.scraped_urls.add(url)
+            self.scraped_urls.add(visit_key)
             
-            # Save HTML for debugging if status is not 200
-            if response.status_code != 200:
-                self._save_debug_html(url, response.text)
+            if response.status_code == 304:
+                self.logger.info("Not modified since last scrape: %s", url)
+                self.unchanged_urls.add(url)
+                return None
+            if body is None:
+                return None
+            
+            # Remember validators so they can be stored with the product
+            if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+                self.validators[url] = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+            
+            html = self._decode_response(body, response.encoding)
+            
+            # Save HTML for debugging if status is an unexpected 2xx (errors were raised above)
+            if self.debug_html and response.status_code != 200:
+                self._save_debug_html(url, html)
                 
-            return response.text
+            return html
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error fetching {url}: {e}")
+            self.logger.error("Error fetching %s: %s", url, e)
             return None
     
-    def _save_debug_html(self, url, html_content):
-        """Save HTML to disk for debugging purposes"""
-        debug_dir = f'debug_html_{self.__class__.__name__.lower()}'
-        os.makedirs(debug_dir, exist_ok=True)
+    def get_pages(self, urls, max_workers=4):
+        """
+        Fetch several pages concurrently - request starts are still spaced per host by get_page
         
-        filename = f"{debug_dir}/{urlparse(url).path.replace('/', '_')}.html"
+        Args:
+            urls (list): URLs to fetch
+            max_workers (int): Maximum concurrent requests (default: 4)
+            
+        Yields:
+            tuple: (url, html, error) in the order of urls; html is None if the page wasn't fetched
+        """
+        def fetch(url):
+            try:
+                return url, self.get_page(url), None
+            except Exception as e:
+                return url, None, e
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(fetch, urls)
+    
+    def _is_cached(self, url):
+        """
+        Check whether a GET for url would be answered from the development HTTP cache
+        
+        Args:
+            url (str): URL about to be fetched
+            
+        Returns:
+            bool: True if a fresh cached response exists
+        """
+        return bool(self.http_cache) and self.session.cache.contains(url=url)
+    
+    def _read_page_body(self, response):
+        """
+        Download a streamed response body unless its headers show it isn't a page worth parsing
+        
+        Args:
+            response (requests.Response): Response fetched with stream=True
+            
+        Returns:
+            bytes or None: The body (with any Content-Encoding removed), None if it was skipped
+        """
+        content_type = response.headers.get('Content-Type', '')
+        content_length = response.headers.get('Content-Length', '')
+        
+        if content_type and 'html' not in content_type and 'xml' not in content_type:
+            self.logger.warning("Skipping non-HTML page (%s): %s", content_type, response.url)
+            return None
+        if content_length.isdigit() and int(content_length) > MAX_PAGE_BYTES:
+            self.logger.warning("Skipping oversized page (%s bytes): %s", content_length, response.url)
+            return None
+        
+        # Content-Length is missing on chunked responses and counts compressed bytes,
+        # so the limit is also enforced on the decoded body as it arrives
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=PAGE_CHUNK_BYTES):
+            size += len(chunk)
+            if size > MAX_PAGE_BYTES:
+                self.logger.warning("Skipping oversized page (over %s bytes): %s", MAX_PAGE_BYTES, response.url)
+                return None
+            chunks.append(chunk)
+        
+        return b''.join(chunks)
+    
+    def get_home_page(self):
+        """
+        Get the site's home page, fetching it at most once per scraper
+        Both category and product discovery start here, and get_page skips
+        URLs it has already scraped, so a second fetch would come back empty
+        
+        Returns:
+            str: HTML content or None if it couldn't be fetched
+        """
+        if self._home_html is None:
+            self._home_html = self.get_page(self.base_url)
+        return self._home_html
+    
+    def _decode_response(self, body, encoding):
+        """
+        Decode a response body without falling back to slow or wrong charset guesses
+        
+        Without a charset in Content-Type, requests reports text/html as ISO-8859-1
+        (garbling Arabic UTF-8 pages) or sniffs the whole body in Python. Strict UTF-8
+        decoding runs in C and covers nearly every modern page, so try it first and
+        fall back to the response's encoding, replacing undecodable bytes as requests does.
+        
+        Args:
+            body (bytes): Response body read by _read_page_body
+            encoding (str or None): Encoding requests derived from the headers
+            
+        Returns:
+            str: Decoded HTML
+        """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            self.logger.info(f"Saved debug HTML: {filename}")
+            return body.decode('utf-8')
+        except UnicodeDecodeError:
+            return str(body, encoding or 'utf-8', errors='replace')
+    
+    def _wait_for_turn(self, url):
+        """
+        Block until this scraper may start another request to the URL's host
+        
+        Args:
+            url (str): URL about to be fetched
+        """
+        host = _parsed(url).netloc
+        with self._throttle_lock:
+            now = time.monotonic()
+            start = max(now, self._next_fetch.get(host, now))
+            self._next_fetch[host] = start + self.delay
+        
+        # Sleep outside the lock so other hosts (and slot reservations) aren't blocked
+        if start > now:
+            time.sleep(start - now)
+    
+    def _host_slot(self, url):
+        """
+        Get the semaphore limiting concurrent requests to a URL's host
+        
+        Args:
+            url (str): URL about to be fetched
+            
+        Returns:
+            threading.BoundedSemaphore: Slot to hold for the duration of the request
+        """
+        host = _parsed(url).netloc
+        with self._throttle_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_requests_per_host)
+        return slot
+    
+    def _save_debug_html(self, url, html_content):
+        """Append HTML to a single compressed JSONL log for debugging purposes"""
+        try:
+            with self._debug_lock:
+                if self._debug_file is None:
+                    debug_dir = f'debug_html_{self.__class__.__name__.lower()}'
+                    os.makedirs(debug_dir, exist_ok=True)
+                    self._debug_file = gzip.open(f'{debug_dir}/debug_html.jsonl.gz', 'at', encoding='utf-8')
+                
+                record = {'url': url, 'timestamp': datetime.now().isoformat(), 'html': html_content}
+                self._debug_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.logger.info("Saved debug HTML: %s", url)
         except Exception as e:
-            self.logger.error(f"Failed to save debug HTML: {e}")
+            self.logger.error("Failed to save debug HTML: %s", e)
+    
+    def close(self):
+        """Close the HTTP session, the debug HTML log and this scraper's hold on its log writer"""
+        with self._debug_lock:
+            if self._debug_file is not None:
+                self._debug_file.close()
+                self._debug_file = None
+        self.session.close()
+        self._release_logger()
+    
+    def _release_logger(self):
+        """Stop the background log writer once no open scraper of this class uses it"""
+        with _LOG_LISTENERS_LOCK:
+            if self._logger_released:
+                return
+            self._logger_released = True
+            
+            started = _LOG_LISTENERS.get(self.logger.name)
+            if not started or started[0] != os.getpid():
+                return
+            pid, listener, users = started
+            if users > 1:
+                _LOG_LISTENERS[self.logger.name] = (pid, listener, users - 1)
+                return
+            
+            del _LOG_LISTENERS[self.logger.name]
+            self.logger.handlers.clear()
+            listener.stop()  # Drains queued records before returning
+            atexit.unregister(listener.stop)
     
     def parse_html(self, html_content):
         """
@@ -121,24 +521,137 @@ class BaseScraper:
         Returns:
             BeautifulSoup: Parsed HTML object
         """
-        return BeautifulSoup(html_content, 'html.parser')
+        return BeautifulSoup(html_content, HTML_PARSER)
+    
+    def parse_fast(self, html_content):
+        """
+        Parse HTML for selector-based extraction, keeping the tree in C when possible
+        
+        Args:
+            html_content (str): Raw HTML content
+            
+        Returns:
+            lxml.html.HtmlElement or BeautifulSoup: Parsed document for extract_text_with_selectors;
+                BeautifulSoup if lxml/cssselect aren't installed or lxml rejects the document
+        """
+        if CSSSelector is not None:
+            try:
+                return lxml.html.document_fromstring(html_content)
+            except (ValueError, lxml.etree.ParserError):
+                # e.g. an XML encoding declaration in a str, or an empty document
+                pass
+        return self.parse_html(html_content)
+    
+    def parse_links(self, html_content, href_contains):
+        """
+        Parse only the links whose href contains the given substring
+        Much cheaper than parse_html + select when only links are needed,
+        since the rest of the document tree is never built
+        
+        Args:
+            html_content (str): Raw HTML content
+            href_contains (str): Substring the link href must contain
+            
+        Returns:
+            list: Matching <a> tags in document order
+        """
+        strainer = SoupStrainer('a', href=lambda href: href and href_contains in href)
+        return BeautifulSoup(html_content, HTML_PARSER, parse_only=strainer).find_all('a')
+    
+    def iter_link_hrefs(self, html_content, href_contains):
+        """
+        Stream the hrefs of links containing the given substring
+        With lxml the page is parsed incrementally, and each <a> and everything before it
+        is freed once read, so memory stays flat on large listing pages and stopping
+        early skips the rest
+        
+        Args:
+            html_content (str): Raw HTML content
+            href_contains (str): Substring the link href must contain
+            
+        Yields:
+            str: Matching hrefs in document order
+        """
+        if HTML_PARSER != 'lxml':
+            for link in self.parse_links(html_content, href_contains):
+                yield link.get('href')
+            return
+        
+        source = io.BytesIO(html_content.encode('utf-8'))
+        for _, element in etree.iterparse(source, events=('end',), tag='a', html=True, encoding='utf-8'):
+            href = element.get('href')
+            # Free the link and everything parsed before it - only its ancestors stay in the tree
+            element.clear()
+            node = element
+            while node.getparent() is not None:
+                while node.getprevious() is not None:
+                    del node.getparent()[0]
+                node = node.getparent()
+            if href and href_contains in href:
+                yield href
+    
+    def select(self, soup, selector):
+        """
+        Find all elements matching a CSS selector
+        
+        Args:
+            soup (BeautifulSoup or lxml.html.HtmlElement): Parsed HTML from parse_html or parse_fast
+            selector (str): CSS selector
+            
+        Returns:
+            list: Matching elements in document order
+        """
+        if not isinstance(soup, Tag):
+            return _css_all(selector)(soup)
+        return soup.select(selector)
+    
+    def element_text(self, element):
+        """
+        Get the stripped text of an element from either parser backend
+        
+        Args:
+            element (bs4.Tag or lxml.html.HtmlElement): Element returned by select
+            
+        Returns:
+            str: Text content of the element and its descendants
+        """
+        if not isinstance(element, Tag):
+            return element.text_content().strip()
+        return element.get_text().strip()
     
     def extract_text_with_selectors(self, soup, selectors, default=''):
         """
         Try multiple selectors to extract text from soup
         
         Args:
-            soup (BeautifulSoup): Parsed HTML
+            soup (BeautifulSoup or lxml.html.HtmlElement): Parsed HTML from parse_html or parse_fast
             selectors (list): List of CSS selectors to try
             default (str): Default value if no selector matches
             
         Returns:
             str: Extracted text or default value
         """
+        if not isinstance(soup, Tag):
+            for selector in selectors:
+                # Bare tag names ('h1') need no CSS translation - find() stops at the first hit
+                if selector.isalnum():
+                    element = soup.find(f'.//{selector}')
+                else:
+                    elements = _css(selector)(soup)
+                    element = elements[0] if elements else None
+                if element is not None:
+                    text = element.text_content().strip()
+                    if text:
+                        return text
+            return default
+        
         for selector in selectors:
-            element = soup.select_one(selector)
-            if element and element.get_text().strip():
-                return element.get_text().strip()
+            # Plain tag lookups skip the soupsieve selector engine
+            element = soup.find(selector) if selector.isalnum() else soup.select_one(selector)
+            if element:
+                text = element.get_text().strip()
+                if text:
+                    return text
         return default
     
     def build_absolute_url(self, relative_url):
@@ -151,9 +664,12 @@ class BaseScraper:
         Returns:
             str: Absolute URL
         """
-        if relative_url.startswith('http'):
+        if relative_url.startswith(('http://', 'https://')):
             return relative_url
-        return urljoin(self.base_url, relative_url)
+        # Root-relative links are the common case - no need to parse either URL
+        if relative_url.startswith('/') and not relative_url.startswith('//') and '/.' not in relative_url:
+            return self.base_origin + relative_url
+        return _join_url(self.base_url, relative_url)
     
     def detect_dynamic_fields(self, product_data, product_url):
         """
@@ -166,62 +682,27 @@ class BaseScraper:
         Returns:
             dict: Updated product data with dynamic fields
         """
+        # Lowercase the URL once for both source and category detection
+        url_lower = product_url.lower()
+        
         # 1. Extract currency from price text
         if product_data.get('price'):
-            price_text = product_data['price']
-            if 'د.ا' in price_text or 'JOD' in price_text.upper():
-                product_data['currency'] = 'JOD'
-            elif '$' in price_text or 'USD' in price_text.upper():
-                product_data['currency'] = 'USD'
-            elif '€' in price_text or 'EUR' in price_text.upper():
-                product_data['currency'] = 'EUR'
-            else:
-                product_data['currency'] = 'JOD'  # Default for Jordan
+            product_data['currency'] = extract_currency_from_price(product_data['price'])
         
         # 2. Detect source website from URL
-        if 'leaders.jo' in product_url.lower():
+        if 'leaders.jo' in url_lower:
             product_data['source_website'] = 'Leaders Center Jordan'
-        elif 'smartbuy' in product_url.lower():
+        elif 'smartbuy' in url_lower:
             product_data['source_website'] = 'SmartBuy Jordan'
         else:
             # Extract domain name
-            domain = urlparse(product_url).netloc
+            domain = _parsed(product_url).netloc
             product_data['source_website'] = domain
         
         # 3. Intelligent category detection
-        url_lower = product_url.lower()
-        title_lower = product_data.get('title', '').lower()
-        
-        # Category detection based on URL patterns and product titles
-        if any(keyword in url_lower or keyword in title_lower for keyword in 
-               ['phone', 'mobile', 'smartphone', 'iphone', 'samsung', 'oppo', 'huawei']):
-            product_data['category'] = 'Mobile Phones'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['laptop', 'computer', 'pc', 'macbook', 'notebook']):
-            product_data['category'] = 'Computers & Laptops'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['watch', 'smartwatch', 'fitness', 'tracker']):
-            product_data['category'] = 'Wearables'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['tv', 'television', 'monitor', 'display', 'screen']):
-            product_data['category'] = 'TVs & Monitors'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['audio', 'speaker', 'headphone', 'earphone', 'sound']):
-            product_data['category'] = 'Audio & Sound'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['camera', 'photo', 'video', 'lens']):
-            product_data['category'] = 'Cameras & Photography'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['gaming', 'game', 'console', 'playstation', 'xbox']):
-            product_data['category'] = 'Gaming'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['washing', 'dryer', 'refrigerator', 'appliance', 'washer']):
-            product_data['category'] = 'Home Appliances'
-        elif any(keyword in url_lower or keyword in title_lower for keyword in 
-                 ['shaver', 'epilator', 'grooming', 'personal care']):
-            product_data['category'] = 'Personal Care'
-        else:
-            product_data['category'] = 'Electronics'  # Default category
+        # URL and title are scanned together; the separator keeps matches from spanning both
+        combined_text = f"{url_lower}\x00{product_data.get('title', '').lower()}"
+        product_data['category'] = _DYNAMIC_CATEGORY_MATCHER.match(combined_text) or 'Electronics'  # Default category
         
         return product_data
     
@@ -244,12 +725,14 @@ class BaseScraper:
             'category': '',
             'brand': '',
             'description': '',
-            'scraped_at': datetime.now().isoformat()
+            'scraped_at': datetime.now(timezone.utc)  # Stored as a native BSON date
         }
     
     def reset_scraped_urls(self):
         """Reset the set of scraped URLs (useful for fresh runs)"""
         self.scraped_urls.clear()
+        self.unchanged_urls.clear()
+        self._home_html = None
         self.logger.info("Reset scraped URLs cache")
     
     # Abstract methods that subclasses should implement
@@ -261,6 +744,82 @@ class BaseScraper:
         """Get product links from category page - to be implemented by subclasses"""
         raise NotImplementedError("Subclasses must implement get_products_from_category")
     
-    def scrape_product(self, product_url):
-        """Scrape individual product - to be implemented by subclasses"""
-        raise NotImplementedError("Subclasses must implement scrape_product")
\ No newline at end of file
+    def parse_product(self, html, product_url):
+        """Extract product data from a product page - to be implemented by subclasses"""
+        raise NotImplementedError("Subclasses must implement parse_product")
+    
+    def scrape_product(self, product_url, scraped_at=None):
+        """
+        Scrape individual product
+        
+        Args:
+            product_url (str): Product URL
+            scraped_at (datetime, optional): Timestamp to record instead of the parse time,
+                so products scraped as one batch share it
+            
+        Returns:
+            dict or None: Product data, None if the page couldn't be fetched
+        """
+        html = self.get_page(product_url)
+        if not html:
+            return None
+        product_data = self.parse_product(html, product_url)
+        if scraped_at is not None:
+            product_data['scraped_at'] = scraped_at
+        return product_data
+    
+    def scrape_products(self, product_urls, max_workers=4, parse_processes=0):
+        """
+        Scrape product pages concurrently - request starts are still spaced per host by get_page
+        
+        Args:
+            product_urls (list): Product URLs to scrape
+            max_workers (int): Maximum concurrent requests (default: 4)
+            parse_processes (int): Worker processes for parsing (default: 0 = parse in the fetch threads)
+            
+        Yields:
+            tuple: (product_url, product_data, error) as each product completes
+        """
+        parse_pool = ProcessPoolExecutor(max_workers=parse_processes) if parse_processes else None
+        
+        # One timestamp for the whole batch - the products were scraped as one run
+        scraped_at = datetime.now(timezone.utc)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                if parse_pool:
+                    futures = {executor.submit(self.scrape_product_in_pool, product_url, parse_pool, scraped_at): product_url
+                               for product_url in product_urls}
+                else:
+                    futures = {executor.submit(self.scrape_product, product_url, scraped_at): product_url
+                               for product_url in product_urls}
+                
+                for future in as_completed(futures):
+                    product_url = futures[future]
+                    try:
+                        yield product_url, future.result(), None
+                    except Exception as e:
+                        yield product_url, None, e
+        finally:
+            if parse_pool:
+                parse_pool.shutdown()
+    
+    def scrape_product_in_pool(self, product_url, parse_pool, scraped_at=None):
+        """
+        Scrape individual product, fetching here and parsing in a worker process
+        
+        Args:
+            product_url (str): Product URL
+            parse_pool (ProcessPoolExecutor): Pool that runs the CPU-bound parsing
+            scraped_at (datetime, optional): Timestamp to record instead of the parse time
+            
+        Returns:
+            dict or None: Product data, None if the page couldn't be fetched
+        """
+        html = self.get_page(product_url)
+        if not html:
+            return None
+        product_data = parse_pool.submit(parse_product_in_worker, type(self), self.base_url, html, product_url).result()
+        if scraped_at is not None:
+            product_data['scraped_at'] = scraped_at
+        return product_data
\ No newline at end of file
@@ -4,12 +4,16 @@ Inherits from BaseScraper and focuses only on site-specific logic
 """
 import sys
 import os
+import re
+import logging
+from dataclasses import dataclass
+from itertools import islice
 
-# Set up proper encoding for Windows console output
+# Set up proper encoding for Windows console output - switched in place on the
+# existing streams, so printing stays in C and unencodable characters are replaced
 if sys.platform == "win32":
-    import codecs
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.detach())
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 # Add src directory to Python path for absolute imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,66 +21,141 @@ src_dir = os.path.dirname(current_dir)  # Go up one level to src/
 if src_dir not in sys.path:
     sys.path.insert(0, src_dir)
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from urllib.parse import urljoin
+
+# Compiled XPath field queries need lxml; without it only the selector lists are used
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
 from datetime import datetime
 
 from scrapers.base_scraper import BaseScraper
 from database.manager import DatabaseManager
 from utils.helpers import classify_product_category, extract_currency_from_price, detect_source_website
 
+# Keywords marking a navigation link as an electronics category
+ELECTRONICS_KEYWORDS = ('laptop', 'computer', 'mobile', 'phone', 'tablet',
+                        'electronics', 'gaming', 'audio', 'camera', 'tv',
+                        'monitor', 'printer', 'accessories', 'apple', 'samsung')
+
+# Single case-insensitive alternation - one scan per string instead of one per keyword
+_ELECTRONICS_RE = re.compile('|'.join(map(re.escape, ELECTRONICS_KEYWORDS)), re.IGNORECASE)
+
+def _first_text_xpath(tag, css_class):
+    """Compile an XPath returning the text of the first <tag> carrying css_class, as a string"""
+    has_class = f"contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')"
+    return etree.XPath(f"string((//{tag}[{has_class}])[1])")
+
+# Leaders.jo runs WooCommerce - its stock single-product markup is tried first,
+# so a product page costs one compiled query per field instead of a selector list
+if etree is not None:
+    SITE_FIELD_XPATHS = {
+        'title': _first_text_xpath('h1', 'product_title'),
+        'price': _first_text_xpath('p', 'price'),
+        'description': _first_text_xpath('div', 'woocommerce-product-details__short-description'),
+    }
+else:
+    SITE_FIELD_XPATHS = {}
+
+# Scraped products written to MongoDB per bulk save in the standalone runner
+SAVE_BATCH_SIZE = 10
+
+# HTTP cache for development reruns of the standalone runner - off unless set to a
+# cache name in the environment (and requests-cache is installed)
+DEV_HTTP_CACHE = os.getenv('LEADERS_HTTP_CACHE')
+
 class LeadersScraper(BaseScraper):
     """Scraper for Leaders.jo website - inherits shared functionality from BaseScraper"""
     
-    def __init__(self):
+    # Navigation menu links - tried in order until one yields categories
+    NAV_SELECTORS = (
+        'nav a',
+        '.navigation a',
+        '.menu a',
+        '.navbar a',
+        '.main-menu a',
+        '.category-menu a',
+        'header a'
+    )
+    
+    # Product page fields - each tried in order until one has text
+    TITLE_SELECTORS = (
+        'h1',
+        '.product-title',
+        '.product-name',
+        '.title',
+        '[data-product-title]',
+        '.product-info h1',
+        '.product-details h1'
+    )
+    PRICE_SELECTORS = (
+        '.price',
+        '.product-price',
+        '.cost',
+        '.amount',
+        '[data-price]',
+        '.money',
+        '.price-current',
+        '.sale-price'
+    )
+    BRAND_SELECTORS = (
+        '.brand',
+        '.manufacturer',
+        '.product-brand',
+        '[data-brand]'
+    )
+    DESCRIPTION_SELECTORS = (
+        '.product-description',
+        '.description',
+        '.product-info p',
+        '.details',
+        '.product-details p'
+    )
+    
+    def __init__(self, http_cache=None):
         # Initialize base scraper with Leaders-specific settings
         # Use shorter delay for testing, can be increased for production
         super().__init__(
             base_url="https://leaders.jo/en/",
-            delay=3  # Reduced delay for testing - increase to 10 for production
+            delay=3,  # Reduced delay for testing - increase to 10 for production
+            http_cache=http_cache
         )
     
     def find_category_links(self):
         """Find category links from the main page - Leaders.jo specific implementation"""
-        html = self.get_page(self.base_url)
+        html = self.get_home_page()
         if not html:
             return []
             
-        soup = self.parse_html(html)
+        # Each selector tier is a compiled query over the raw lxml tree rather than a soupsieve tree walk
+        tree = self.parse_fast(html)
         category_links = []
+        seen_urls = set()
         
-        # Look for navigation menu links - try various selectors
-        nav_selectors = [
-            'nav a',
-            '.navigation a',
-            '.menu a',
-            '.navbar a',
-            '.main-menu a',
-            '.category-menu a',
-            'header a'
-        ]
+        # Checked once - the per-link log call below is skipped entirely when INFO is filtered out
+        log_matches = self.logger.isEnabledFor(logging.INFO)
         
-        for selector in nav_selectors:
-            links = soup.select(selector)
+        # Look for navigation menu links - try various selectors
+        for selector in self.NAV_SELECTORS:
+            links = self.select(tree, selector)
             for link in links[:10]:  # Limit to first 10 for testing
                 href = link.get('href')
-                text = link.get_text().strip()
+                if not href:
+                    continue
+                text = self.element_text(link)
                 
-                if href and text:
+                # Filter for category-like links (electronics related) before building the URL
+                if text and (_ELECTRONICS_RE.search(href) or _ELECTRONICS_RE.search(text)):
                     # Convert relative URLs to absolute
                     full_url = self.build_absolute_url(href)
                     
-                    # Filter for category-like links (electronics related)
-                    electronics_keywords = ['laptop', 'computer', 'mobile', 'phone', 'tablet', 
-                                          'electronics', 'gaming', 'audio', 'camera', 'tv',
-                                          'monitor', 'printer', 'accessories', 'apple', 'samsung']
-                    
-                    if (any(keyword in text.lower() for keyword in electronics_keywords) or
-                        any(keyword in href.lower() for keyword in electronics_keywords)):
-                        
-                        if full_url not in [item[1] for item in category_links]:
-                            category_links.append((text, full_url))
-                            self.logger.info(f"Found category: {text} -> {full_url}")
+                    if full_url not in seen_urls:
+                        seen_urls.add(full_url)
+                        category_links.append((text, full_url))
+                        if log_matches:
+                            self.logger.info("Found category: %s -> %s", text, full_url)
             
             if category_links:  # If we found some, break
                 break
@@ -84,14 +163,14 @@ class LeadersScraper(BaseScraper):
         # If no specific categories found, try to find any product-containing pages
         if not category_links:
             self.logger.info("No specific categories found, looking for any product pages...")
-            product_links = soup.select('a[href*="product"]')
+            product_links = self.select(tree, 'a[href*="product"]')
             for link in product_links[:3]:
                 href = link.get('href')
-                text = link.get_text().strip() or "Product Page"
+                text = self.element_text(link) or "Product Page"
                 if href:
                     full_url = self.build_absolute_url(href)
                     category_links.append((text, full_url))
-                    self.logger.info(f"Found product page: {text} -> {full_url}")
+                    self.logger.info("Found product page: %s -> %s", text, full_url)
         
         return category_links
     
@@ -101,31 +180,18 @@ class LeadersScraper(BaseScraper):
         if not html:
             return []
             
-        soup = self.parse_html(html)
         product_links = []
+        seen_urls = set()
         
-        # Look specifically for actual product links with /product/ pattern
-        product_selectors = [
-            'a[href*="/product/"]',  # Actual product pages
-            '.product a[href*="/product/"]',
-            '.product-item a[href*="/product/"]',
-            '.product-card a[href*="/product/"]'
-        ]
-        
-        for selector in product_selectors:
-            links = soup.select(selector)
-            for link in links[:max_products]:
-                href = link.get('href')
-                if href and '/product/' in href:  # Must contain /product/
-                    full_url = self.build_absolute_url(href)
-                    
-                    # Avoid category pages and ensure it's an actual product
-                    if '/product-category/' not in full_url and full_url not in product_links:
-                        product_links.append(full_url)
-                        self.logger.info(f"Found product: {full_url}")
-            
-            if product_links:  # If we found some, use them
-                break
+        # Look specifically for actual product links with /product/ pattern (category pages excluded) -
+        # one streaming pass over the page's links, stopping once enough are found
+        for full_url in self.iter_product_links(html):
+            if full_url not in seen_urls:
+                seen_urls.add(full_url)
+                product_links.append(full_url)
+                self.logger.info("Found product: %s", full_url)
+                if len(product_links) >= max_products:
+                    break
         
         # If no products found with /product/ pattern, try to find them on the main products page
         if not product_links:
@@ -133,186 +199,221 @@ class LeadersScraper(BaseScraper):
             main_products_url = "https://leaders.jo/en/products/"
             main_html = self.get_page(main_products_url)
             if main_html:
-                main_soup = self.parse_html(main_html)
-                main_links = main_soup.select('a[href*="/product/"]')
-                for link in main_links[:max_products]:
-                    href = link.get('href')
-                    if href and '/product/' in href:
-                        full_url = self.build_absolute_url(href)
-                        if '/product-category/' not in full_url:
-                            product_links.append(full_url)
-                            self.logger.info(f"Found product from main page: {full_url}")
+                for full_url in islice(self.iter_product_links(main_html), max_products):
+                    product_links.append(full_url)
+                    self.logger.info("Found product from main page: %s", full_url)
         
         return product_links
     
-    def scrape_product(self, product_url):
-        """Scrape basic info from a product page - Leaders.jo specific implementation"""
-        html = self.get_page(product_url)
-        if not html:
-            return None
+    def iter_product_links(self, html):
+        """
+        Stream absolute product URLs from a page without building its full tree
+        
+        Args:
+            html (str): Raw HTML of a listing or home page
             
-        soup = self.parse_html(html)
+        Yields:
+            str: Absolute product URLs in document order (category pages excluded)
+        """
+        for href in self.iter_link_hrefs(html, '/product/'):
+            if '/product-category/' not in href:
+                yield self.build_absolute_url(href)
+    
+    def extract_field(self, soup, field, selectors):
+        """
+        Extract a product field from the site's own markup, falling back to generic selectors
+        
+        Args:
+            soup (BeautifulSoup or lxml.html.HtmlElement): Parsed HTML from parse_fast
+            field (str): Field name in SITE_FIELD_XPATHS
+            selectors (tuple): Generic CSS selectors tried when the site markup has no text
+            
+        Returns:
+            str: Extracted text or '' if nothing matched
+        """
+        xpath = SITE_FIELD_XPATHS.get(field)
+        if xpath is not None and not isinstance(soup, Tag):
+            text = xpath(soup).strip()
+            if text:
+                return text
+        return self.extract_text_with_selectors(soup, selectors)
+    
+    def parse_product(self, html, product_url):
+        """Extract basic info from a product page - Leaders.jo specific implementation"""
+        soup = self.parse_fast(html)
         
         # Create product data template
         product_data = self.create_product_data_template(product_url)
         
         try:
-            # Title - try multiple selectors
-            title_selectors = [
-                'h1',
-                '.product-title',
-                '.product-name', 
-                '.title',
-                '[data-product-title]',
-                '.product-info h1',
-                '.product-details h1'
-            ]
-            product_data['title'] = self.extract_text_with_selectors(soup, title_selectors)
-            
-            # Price - try multiple selectors
-            price_selectors = [
-                '.price',
-                '.product-price',
-                '.cost',
-                '.amount',
-                '[data-price]',
-                '.money',
-                '.price-current',
-                '.sale-price'
-            ]
-            product_data['price'] = self.extract_text_with_selectors(soup, price_selectors)
+            product_data['title'] = self.extract_field(soup, 'title', self.TITLE_SELECTORS)
+            product_data['price'] = self.extract_field(soup, 'price', self.PRICE_SELECTORS)
             
             # Brand - try to find brand info
-            brand_selectors = [
-                '.brand',
-                '.manufacturer',
-                '.product-brand',
-                '[data-brand]'
-            ]
-            product_data['brand'] = self.extract_text_with_selectors(soup, brand_selectors)
+            product_data['brand'] = self.extract_text_with_selectors(soup, self.BRAND_SELECTORS)
             
             # Description - first paragraph or description div
-            desc_selectors = [
-                '.product-description',
-                '.description',
-                '.product-info p',
-                '.details',
-                '.product-details p'
-            ]
-            description = self.extract_text_with_selectors(soup, desc_selectors)
+            description = self.extract_field(soup, 'description', self.DESCRIPTION_SELECTORS)
             if description:
                 product_data['description'] = description[:200]  # First 200 chars
             
             # Apply dynamic field detection from base class
             product_data = self.detect_dynamic_fields(product_data, product_url)
             
-            self.logger.info(f"Scraped product: {product_data['title']}")
+            self.logger.info("Scraped product: %s", product_data['title'])
             
         except Exception as e:
-            self.logger.error(f"Error parsing product {product_url}: {e}")
+            self.logger.error("Error parsing product %s: %s", product_url, e)
         
         return product_data
 
 
-def main():
-    """Main function to scrape multiple products and save to database"""
-    scraper = LeadersScraper()
+@dataclass(slots=True)
+class ScrapeResult:
+    """Outcome of scraping one product URL in the standalone runner"""
+    url: str
+    ok: bool
+    title: str = ''
+    price: str = ''
+    error: str | None = None
     
-    # Use database manager from shared module
-    with DatabaseManager() as db:
-        print("Starting Leaders.jo scraper with database integration...")
+    def report(self, position, total):
+        """
+        Format the console report for this product
         
-        try:
-            # Known working product URLs for reliable testing
-            known_products = [
-                'https://leaders.jo/en/product/oppo-reno-14-five-g-512gb-12-ram/',
-                # Only test with 1 product to avoid timeout during development
-                # 'https://leaders.jo/en/product/reebok-relay-sport-smartwatch/',
-            ]
+        Args:
+            position (int): 1-based position of the product in the run
+            total (int): Number of products in the run
             
-            total_products_saved = 0
-            total_errors = 0
+        Returns:
+            str: Multi-line status report
+        """
+        header = f"\n2. Scraped product {position}/{total}...\n   URL: {self.url}"
+        if self.ok:
+            return f"{header}\n   Scraped: {self.title}...\n   Price: {self.price}"
+        return f"{header}\n   ❌ {self.error}"
+
+
+def save_pending_products(db, pending_products):
+    """
+    Save buffered products with a single bulk write
+    
+    Args:
+        db (DatabaseManager): Open database manager
+        pending_products (list): Scraped product dictionaries (cleared afterwards)
+        
+    Returns:
+        tuple: (products saved, products that failed to save)
+    """
+    if not pending_products:
+        return 0, 0
+    
+    saved = db.save_products(pending_products)
+    failed = len(pending_products) - saved
+    pending_products.clear()
+    
+    print(f"   💾 Saved {saved} products to database")
+    if failed:
+        print(f"   ❌ Failed to save {failed} products")
+    return saved, failed
+
+
+def main():
+    """Main function to scrape multiple products and save to database"""
+    # Fetches live pages unless LEADERS_HTTP_CACHE opts into the development cache
+    scraper = LeadersScraper(http_cache=DEV_HTTP_CACHE)
+    
+    try:
+        # Use database manager from shared module
+        with DatabaseManager() as db:
+            print("Starting Leaders.jo scraper with database integration...")
             
-            # Step 1: Try to find more products from main page
-            print("\n1. Finding additional products from main page...")
             try:
-                additional_products = []
-                html = scraper.get_page('https://leaders.jo/en/')
-                if html:
-                    soup = scraper.parse_html(html)
-                    product_links = soup.select('a[href*="/product/"]')
-                    
-                    for link in product_links[:1]:  # Get only 1 additional for testing
-                        href = link.get('href')
-                        if href and '/product/' in href and '/product-category/' not in href:
-                            product_url = scraper.build_absolute_url(href)
-                            
-                            if product_url not in known_products:
-                                additional_products.append(product_url)
-                                scraper.logger.info(f"Found additional product: {product_url}")
+                # Known working product URLs for reliable testing
+                known_products = [
+                    'https://leaders.jo/en/product/oppo-reno-14-five-g-512gb-12-ram/',
+                    # Only test with 1 product to avoid timeout during development
+                    # 'https://leaders.jo/en/product/reebok-relay-sport-smartwatch/',
+                ]
                 
-                # Combine known products with discovered ones
-                all_products = known_products + additional_products
+                total_products_saved = 0
+                total_errors = 0
                 
-            except Exception as e:
-                scraper.logger.warning(f"Error finding additional products: {e}")
-                all_products = known_products
-            
-            print(f"Total products to scrape: {len(all_products)}")
-            
-            # Step 2: Scrape each product
-            for i, product_url in enumerate(all_products, 1):
+                # Step 1: Try to find more products from main page
+                print("\n1. Finding additional products from main page...")
                 try:
-                    print(f"\n2. Scraping product {i}/{len(all_products)}...")
-                    print(f"   URL: {product_url}")
+                    additional_products = []
+                    known_urls = frozenset(known_products)
+                    html = scraper.get_home_page()
+                    if html:
+                        # Get only 1 additional for testing - parsing stops once it's found
+                        for product_url in islice(scraper.iter_product_links(html), 1):
+                            if product_url not in known_urls:
+                                additional_products.append(product_url)
+                                scraper.logger.info("Found additional product: %s", product_url)
                     
-                    product_data = scraper.scrape_product(product_url)
+                    # Combine known products with discovered ones
+                    all_products = known_products + additional_products
                     
-                    if product_data and product_data.get('title'):
-                        # Save to database
-                        if db.save_product(product_data):
-                            total_products_saved += 1
-                            # Handle encoding issues for console output
-                            title = str(product_data['title'])[:50]
-                            price = str(product_data.get('price', 'N/A'))
-                            try:
-                                print(f"   Saved: {title}...")
-                                print(f"   Price: {price}")
-                            except UnicodeEncodeError:
-                                print(f"   Saved: [Product with special characters]...")
-                                print(f"   Price: {price}")
-                        else:
-                            total_errors += 1
-                            print(f"   ❌ Failed to save product")
-                    else:
-                        total_errors += 1
-                        print(f"   ❌ Failed to scrape product data")
-                        
                 except Exception as e:
-                    total_errors += 1
-                    print(f"   ❌ Error with product {product_url}: {e}")
-            
-            # Log the session
-            status = "success" if total_products_saved > 0 else "failed"
-            db.log_scraping_session(
-                website="Leaders Center Jordan",
-                status=status,
-                products_count=total_products_saved,
-                notes=f"Scraped {len(all_products)} product URLs, {total_errors} errors"
-            )
-            
-            print(f"\n✅ Scraping completed!")
-            print(f"Total products saved: {total_products_saved}")
-            print(f"Total errors: {total_errors}")
-            
-        except Exception as e:
-            print(f"❌ Fatal error: {e}")
-            db.log_scraping_session(
-                website="Leaders Center Jordan",
-                status="failed",
-                products_count=total_products_saved,
-                notes=f"Fatal error: {str(e)}"
-            )
+                    scraper.logger.warning("Error finding additional products: %s", e)
+                    all_products = known_products
+                
+                print(f"Total products to scrape: {len(all_products)}")
+                
+                # Step 2: Scrape products concurrently - get_page still spaces requests by the site delay
+                # Scraped products are buffered and saved in batches instead of one write each
+                pending_products = []
+                scrape_results = []
+                for product_url, product_data, error in scraper.scrape_products(all_products):
+                    if error:
+                        result = ScrapeResult(product_url, False, error=f"Error with product {product_url}: {error}")
+                    elif product_data and product_data.get('title'):
+                        result = ScrapeResult(product_url, True, str(product_data['title'])[:50],
+                                              str(product_data.get('price', 'N/A')))
+                        pending_products.append(product_data)
+                        
+                        if len(pending_products) >= SAVE_BATCH_SIZE:
+                            saved, failed = save_pending_products(db, pending_products)
+                            total_products_saved += saved
+                            total_errors += failed
+                    else:
+                        result = ScrapeResult(product_url, False, error="Failed to scrape product data")
+                    scrape_results.append(result)
+                
+                # Per-product reports are written in one call instead of a print() per line
+                sys.stdout.write('\n'.join(result.report(i, len(all_products))
+                                           for i, result in enumerate(scrape_results, 1)) + '\n')
+                total_errors += sum(1 for result in scrape_results if not result.ok)
+                
+                # Save whatever is left from the last partial batch
+                saved, failed = save_pending_products(db, pending_products)
+                total_products_saved += saved
+                total_errors += failed
+                
+                # Log the session
+                status = "success" if total_products_saved > 0 else "failed"
+                db.log_scraping_session(
+                    website="Leaders Center Jordan",
+                    status=status,
+                    products_count=total_products_saved,
+                    notes=f"Scraped {len(all_products)} product URLs, {total_errors} errors"
+                )
+                
+                print(f"\n✅ Scraping completed!\n"
+                      f"Total products saved: {total_products_saved}\n"
+                      f"Total errors: {total_errors}")
+                
+            except Exception as e:
+                print(f"❌ Fatal error: {e}")
+                db.log_scraping_session(
+                    website="Leaders Center Jordan",
+                    status="failed",
+                    products_count=total_products_saved,
+                    notes=f"Fatal error: {str(e)}"
+                )
+    finally:
+        scraper.close()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Inherits from BaseScraper and focuses only on site-specific logic
 """
 import sys
 import os
+import re
 
 # Add src directory to Python path for absolute imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,9 +20,98 @@ from scrapers.base_scraper import BaseScraper
 from database.manager import DatabaseManager
 from utils.helpers import classify_product_category, extract_currency_from_price, detect_source_website
 
+# Common brand names in electronics, paired with their upper-cased form for title matching
+TITLE_BRANDS = tuple((brand, brand.upper()) for brand in (
+    'Samsung', 'Apple', 'LG', 'Sony', 'Huawei', 'Oppo', 'Xiaomi',
+    'Dell', 'HP', 'Lenovo', 'Asus', 'Acer', 'Microsoft', 'Google'
+))
+
+# Navigation link texts that are never product collections
+NAV_SKIP_WORDS = ('home', 'about', 'contact', 'search')
+
+# URL fragments marking non-product pages even under /products/
+NON_PRODUCT_URL_PARTS = ('cart', 'checkout', 'account', 'login', 'register',
+                         'search', 'contact', 'about', 'privacy', 'terms',
+                         'shipping', 'returns', 'admin', 'api')
+
+# Single case-insensitive alternations - one scan per string instead of one per word
+_NAV_SKIP_RE = re.compile('|'.join(map(re.escape, NAV_SKIP_WORDS)), re.IGNORECASE)
+_NON_PRODUCT_URL_RE = re.compile('|'.join(map(re.escape, NON_PRODUCT_URL_PARTS)))
+
+# Absolute product URLs embedded in page source or scripts
+_SOURCE_PRODUCT_URL_RE = re.compile(r'https?://smartbuy-me\.com/products/[a-zA-Z0-9\-_]+')
+
+# Concurrent fetches when probing known collections - the per-host limits in get_page still apply
+CATEGORY_PROBE_WORKERS = 4
+
 class SmartBuyScraper(BaseScraper):
     """Scraper for SmartBuy Jordan website - inherits shared functionality from BaseScraper"""
     
+    # Product page fields - SmartBuy specific selectors, each tried in order until one has text
+    TITLE_SELECTORS = (
+        'h1.product-title',
+        'h1',
+        '.product-name',
+        '.product-title',
+        '[data-product-title]',
+        '.entry-title'
+    )
+    PRICE_SELECTORS = (
+        '.price .amount',
+        '.product-price',
+        '.price',
+        '.cost',
+        '[data-price]',
+        '.woocommerce-Price-amount'
+    )
+    BRAND_SELECTORS = (
+        '.brand',
+        '.product-brand',
+        '.manufacturer',
+        '[data-brand]'
+    )
+    DESCRIPTION_SELECTORS = (
+        '.product-description',
+        '.product-content',
+        '.entry-content p',
+        '.description',
+        '.product-details'
+    )
+    
+    # Collections probed directly before falling back to home page navigation
+    KNOWN_CATEGORIES = (
+        ('iPhone 12', 'https://smartbuy-me.com/collections/iphone-12'),
+        ('Tablets', 'https://smartbuy-me.com/collections/tablets'),
+        ('Heat Pump', 'https://smartbuy-me.com/collections/heat-pump'),
+    )
+    
+    # Brands that have their own /collections/<brand> page
+    KNOWN_BRANDS = (
+        'apple', 'samsung', 'nespresso', 'lenovo', 'dell', 'sony', 
+        'asus', 'huawei', 'hp', 'xiaomi', 'beko', 'bosch', 
+        'infinix', 'braun', 'canon', 'd-link'
+    )
+    
+    # Home page navigation links to collections, most specific first
+    NAV_SELECTORS = (
+        'nav a[href*="/collections/"]',
+        '.navigation a[href*="/collections/"]',
+        '.menu a[href*="/collections/"]',
+        'a[href*="/collections/"]'
+    )
+    
+    # SmartBuy uses /products/ URLs - direct product links are tried first
+    PRODUCT_LINK_SELECTORS = (
+        'a[href*="/products/"]',
+        '.product a[href*="/products/"]',
+        '.product-item a[href*="/products/"]', 
+        '.grid-item a[href*="/products/"]',
+        '.collection-item a[href*="/products/"]',
+        '.product-card a[href*="/products/"]',
+        '.product-link[href*="/products/"]',
+        '[data-product-url*="/products/"]'
+    )
+    
     def __init__(self):
         # Initialize base scraper with SmartBuy-specific settings
         super().__init__(
@@ -33,109 +123,83 @@ class SmartBuyScraper(BaseScraper):
         """Find category links from the main page - SmartBuy specific implementation"""
         self.logger.info("Looking for SmartBuy collections and categories...")
         category_links = []
+        seen_urls = set()
         
-        # Updated known categories based on actual SmartBuy website structure
-        known_categories = [
-            ('iPhone 12', 'https://smartbuy-me.com/collections/iphone-12'),
-            ('Tablets', 'https://smartbuy-me.com/collections/tablets'),
-            ('Heat Pump', 'https://smartbuy-me.com/collections/heat-pump'),
-        ]
-        
-        # All known brands from your list
-        known_brands = [
-            'apple', 'samsung', 'nespresso', 'lenovo', 'dell', 'sony', 
-            'asus', 'huawei', 'hp', 'xiaomi', 'beko', 'bosch', 
-            'infinix', 'braun', 'canon', 'd-link'
-        ]
-        
-        # Add brand collections
-        for brand in known_brands:
+        # Known categories plus one collection per known brand
+        known_categories = list(self.KNOWN_CATEGORIES)
+        for brand in self.KNOWN_BRANDS:
             brand_name = brand.upper()
             brand_url = f"https://smartbuy-me.com/collections/{brand.lower()}"
             known_categories.append((brand_name, brand_url))
         
-        # Test each known category to see if it exists and has products
-        for category_name, category_url in known_categories[:10]:  # Test first 10
-            self.logger.info(f"Testing category: {category_name} -> {category_url}")
-            try:
-                html = self.get_page(category_url)
-                if html and len(html) > 2000:  # Valid page should have substantial content
-                    # Quick check for product indicators
-                    if ('/products/' in html or 'product' in html.lower()):
-                        category_links.append((category_name, category_url))
-                        self.logger.info(f"[OK] Found valid category: {category_name}")
-                    else:
-                        self.logger.info(f"⚠️  Category exists but may be empty: {category_name}")
+        # Test each known category to see if it exists and has products - probes are fetched
+        # concurrently but results are checked in order, so the category order stays the same
+        probes = known_categories[:10]  # Test first 10
+        pages = self.get_pages([category_url for _, category_url in probes], CATEGORY_PROBE_WORKERS)
+        for (category_name, category_url), (_, html, error) in zip(probes, pages):
+            self.logger.info("Testing category: %s -> %s", category_name, category_url)
+            if error:
+                self.logger.warning("Error testing category %s: %s", category_name, error)
+            elif html and len(html) > 2000:  # Valid page should have substantial content
+                # Quick check for product indicators
+                if ('/products/' in html or 'product' in html.lower()):
+                    category_links.append((category_name, category_url))
+                    seen_urls.add(category_url)
+                    self.logger.info("[OK] Found valid category: %s", category_name)
                 else:
-                    self.logger.info(f"❌ Category not accessible: {category_name}")
-            except Exception as e:
-                self.logger.warning(f"Error testing category {category_name}: {e}")
+                    self.logger.info("⚠️  Category exists but may be empty: %s", category_name)
+            else:
+                self.logger.info("❌ Category not accessible: %s", category_name)
         
         # Try to discover more collections from main page navigation
         try:
-            html = self.get_page(self.base_url)
+            html = self.get_home_page()
             if html:
-                soup = self.parse_html(html)
+                # Selector tiers run as compiled lxml queries when available
+                tree = self.parse_fast(html)
                 
                 # Look for navigation menus and collection links
-                nav_selectors = [
-                    'nav a[href*="/collections/"]',
-                    '.navigation a[href*="/collections/"]',
-                    '.menu a[href*="/collections/"]',
-                    'a[href*="/collections/"]'
-                ]
-                
-                for selector in nav_selectors:
-                    collection_links = soup.select(selector)
+                for selector in self.NAV_SELECTORS:
+                    collection_links = self.select(tree, selector)
                     for link in collection_links:
                         href = link.get('href')
                         if href and '/collections/' in href:
                             full_url = self.build_absolute_url(href)
-                            text = link.get_text().strip() or href.split('/')[-1].replace('-', ' ').title()
+                            text = self.element_text(link) or href.split('/')[-1].replace('-', ' ').title()
                             
                             # Skip if already have this collection
-                            if (full_url not in [item[1] for item in category_links] and
+                            if (full_url not in seen_urls and
                                 len(text) > 2 and 
-                                not any(skip in text.lower() for skip in ['home', 'about', 'contact', 'search'])):
+                                not _NAV_SKIP_RE.search(text)):
                                 
+                                seen_urls.add(full_url)
                                 category_links.append((text, full_url))
-                                self.logger.info(f"[COLLECTION] Discovered collection: {text} -> {full_url}")
+                                self.logger.info("[COLLECTION] Discovered collection: %s -> %s", text, full_url)
                     
                     if len(category_links) >= 10:  # Found enough
                         break
         except Exception as e:
-            self.logger.warning(f"Error discovering collections: {e}")
+            self.logger.warning("Error discovering collections: %s", e)
         
-        self.logger.info(f"Total categories found: {len(category_links)}")
+        self.logger.info("Total categories found: %s", len(category_links))
         # Convert list of tuples to dictionary
         category_dict = {name: url for name, url in category_links[:6]}
         return category_dict  # Return dict for compatibility
     
     def get_products_from_category(self, category_url, max_products=5):
         """Get product links from a category page - SmartBuy specific implementation"""
-        self.logger.info(f"Scraping products from category: {category_url}")
+        self.logger.info("Scraping products from category: %s", category_url)
         html = self.get_page(category_url)
         if not html:
             return []
             
-        soup = self.parse_html(html)
+        tree = self.parse_fast(html)
         product_links = []
+        seen_urls = set()
         
-        # SmartBuy uses /products/ URLs - look for these patterns with more specific selectors
-        product_selectors = [
-            'a[href*="/products/"]',  # Direct product links - most important
-            '.product a[href*="/products/"]',
-            '.product-item a[href*="/products/"]', 
-            '.grid-item a[href*="/products/"]',
-            '.collection-item a[href*="/products/"]',
-            '.product-card a[href*="/products/"]',
-            '.product-link[href*="/products/"]',
-            '[data-product-url*="/products/"]'
-        ]
-        
-        for selector in product_selectors:
-            links = soup.select(selector)
-            self.logger.info(f"Found {len(links)} potential product links with selector: {selector}")
+        for selector in self.PRODUCT_LINK_SELECTORS:
+            links = self.select(tree, selector)
+            self.logger.info("Found %s potential product links with selector: %s", len(links), selector)
             
             for link in links:
                 href = link.get('href') or link.get('data-product-url')
@@ -144,11 +208,12 @@ class SmartBuyScraper(BaseScraper):
                     
                     # Validate it's a product URL and not duplicate
                     if (self._is_product_url(full_url) and 
-                        full_url not in product_links and
+                        full_url not in seen_urls and
                         len(product_links) < max_products):
                         
+                        seen_urls.add(full_url)
                         product_links.append(full_url)
-                        self.logger.info(f"[PRODUCT] Found product: {full_url}")
+                        self.logger.info("[PRODUCT] Found product: %s", full_url)
             
             if product_links:  # Found products with this selector, use them
                 break
@@ -156,7 +221,7 @@ class SmartBuyScraper(BaseScraper):
         # Enhanced fallback: Look for any links that might be products
         if not product_links:
             self.logger.info("No products found with specific selectors, trying enhanced fallback...")
-            all_links = soup.find_all('a', href=True)
+            all_links = self.select(tree, 'a[href]')
             
             for link in all_links:
                 href = link.get('href')
@@ -164,24 +229,24 @@ class SmartBuyScraper(BaseScraper):
                     full_url = self.build_absolute_url(href)
                     
                     # Check if it matches SmartBuy product patterns
-                    if self._is_product_url(full_url) and full_url not in product_links:
+                    if self._is_product_url(full_url) and full_url not in seen_urls:
+                        seen_urls.add(full_url)
                         product_links.append(full_url)
-                        self.logger.info(f"🔍 Fallback found product: {full_url}")
+                        self.logger.info("🔍 Fallback found product: %s", full_url)
         
         # If still no products, try to find products in page source or JavaScript
         if not product_links:
             self.logger.info("Trying to find products in page source...")
             # Look for product URLs in the HTML source directly
-            import re
-            product_pattern = r'https?://smartbuy-me\.com/products/[a-zA-Z0-9\-_]+'
-            found_urls = re.findall(product_pattern, html)
+            found_urls = _SOURCE_PRODUCT_URL_RE.findall(html)
             
             for url in found_urls[:max_products]:
-                if url not in product_links:
+                if url not in seen_urls:
+                    seen_urls.add(url)
                     product_links.append(url)
-                    self.logger.info(f"� Source found product: {url}")
+                    self.logger.info("� Source found product: %s", url)
         
-        self.logger.info(f"Total products found: {len(product_links)}")
+        self.logger.info("Total products found: %s", len(product_links))
         return product_links
     
     def _is_product_url(self, url):
@@ -200,11 +265,7 @@ class SmartBuyScraper(BaseScraper):
             return False
         
         # Skip obvious non-product pages even if they contain /products/
-        skip_patterns = ['cart', 'checkout', 'account', 'login', 'register', 
-                        'search', 'contact', 'about', 'privacy', 'terms', 
-                        'shipping', 'returns', 'admin', 'api']
-        
-        if any(pattern in url_lower for pattern in skip_patterns):
+        if _NON_PRODUCT_URL_RE.search(url_lower):
             return False
         
         # Extract the product ID/slug from the URL
@@ -226,97 +287,55 @@ class SmartBuyScraper(BaseScraper):
     
     def test_known_product_url(self, product_url):
         """Test a known product URL to validate scraping logic"""
-        self.logger.info(f"Testing known product URL: {product_url}")
+        self.logger.info("Testing known product URL: %s", product_url)
         
         if not self._is_product_url(product_url):
-            self.logger.error(f"❌ URL validation failed: {product_url}")
+            self.logger.error("❌ URL validation failed: %s", product_url)
             return False
         
         product_data = self.scrape_product(product_url)
         if product_data and product_data.get('title'):
-            self.logger.info(f"[SUCCESS] Successfully scraped: {product_data['title']}")
-            self.logger.info(f"   Price: {product_data.get('price', 'N/A')}")
-            self.logger.info(f"   Category: {product_data.get('category', 'N/A')}")
+            self.logger.info("[SUCCESS] Successfully scraped: %s", product_data['title'])
+            self.logger.info("   Price: %s", product_data.get('price', 'N/A'))
+            self.logger.info("   Category: %s", product_data.get('category', 'N/A'))
             return True
         else:
-            self.logger.error(f"❌ Failed to scrape product data from: {product_url}")
+            self.logger.error("❌ Failed to scrape product data from: %s", product_url)
             return False
     
-    def scrape_product(self, product_url):
-        """Scrape basic info from a product page - SmartBuy specific implementation"""
-        html = self.get_page(product_url)
-        if not html:
-            return None
-            
-        soup = self.parse_html(html)
+    def parse_product(self, html, product_url):
+        """Extract basic info from a product page - SmartBuy specific implementation"""
+        soup = self.parse_fast(html)
         
         # Create product data template
         product_data = self.create_product_data_template(product_url)
         
         try:
-            # Title - SmartBuy specific selectors
-            title_selectors = [
-                'h1.product-title',
-                'h1',
-                '.product-name',
-                '.product-title',
-                '[data-product-title]',
-                '.entry-title'
-            ]
-            product_data['title'] = self.extract_text_with_selectors(soup, title_selectors)
-            
-            # Price - SmartBuy specific selectors
-            price_selectors = [
-                '.price .amount',
-                '.product-price',
-                '.price',
-                '.cost',
-                '[data-price]',
-                '.woocommerce-Price-amount'
-            ]
-            product_data['price'] = self.extract_text_with_selectors(soup, price_selectors)
+            product_data['title'] = self.extract_text_with_selectors(soup, self.TITLE_SELECTORS)
+            product_data['price'] = self.extract_text_with_selectors(soup, self.PRICE_SELECTORS)
             
             # Brand - try to extract from title or specific elements
-            brand_selectors = [
-                '.brand',
-                '.product-brand',
-                '.manufacturer',
-                '[data-brand]'
-            ]
-            brand = self.extract_text_with_selectors(soup, brand_selectors)
+            brand = self.extract_text_with_selectors(soup, self.BRAND_SELECTORS)
             
             # If no brand found, try to extract from title
             if not brand and product_data['title']:
-                # Common brand names in electronics
-                brands = ['Samsung', 'Apple', 'LG', 'Sony', 'Huawei', 'Oppo', 'Xiaomi', 
-                         'Dell', 'HP', 'Lenovo', 'Asus', 'Acer', 'Microsoft', 'Google']
                 title_upper = product_data['title'].upper()
-                for brand_name in brands:
-                    if brand_name.upper() in title_upper:
-                        brand = brand_name
-                        break
+                brand = next((name for name, name_upper in TITLE_BRANDS if name_upper in title_upper), '')
             
             product_data['brand'] = brand
             
-            # Description - SmartBuy specific selectors
-            desc_selectors = [
-                '.product-description',
-                '.product-content',
-                '.entry-content p',
-                '.description',
-                '.product-details'
-            ]
-            description = self.extract_text_with_selectors(soup, desc_selectors)
+            # Description - first matching description block
+            description = self.extract_text_with_selectors(soup, self.DESCRIPTION_SELECTORS)
             if description:
                 product_data['description'] = description[:200]  # First 200 chars
             
             # Apply dynamic field detection from base class
             product_data = self.detect_dynamic_fields(product_data, product_url)
             
-            self.logger.info(f"Scraped product: {product_data['title']}")
+            self.logger.info("Scraped product: %s", product_data['title'])
             
         except Exception as e:
-            self.logger.error(f"Error parsing product {product_url}: {e}")
+            self.logger.error("Error parsing product %s: %s", product_url, e)
         
         return product_data
 
@@ -342,7 +361,7 @@ def main():
                 print(f"   Category: {test_product.get('category', 'N/A')}")
                 
                 # Save test product
-                if db.save_product(test_product):
+                if db.save_products([test_product]):
                     print(f"[OK] Test product saved to database")
                 else:
                     print("❌ Failed to save test product")
@@ -379,8 +398,8 @@ def main():
                     
                     print(f"  Found {len(product_urls)} products in {category_name}")
                     
-                    # Step 3: Scrape each product and save to database
-                    category_saved = 0
+                    # Step 3: Scrape each product - the category's products are saved in one bulk write
+                    pending_products = []
                     for i, product_url in enumerate(product_urls, 1):
                         try:
                             print(f"  Scraping product {i}/{len(product_urls)}...")
@@ -389,16 +408,10 @@ def main():
                             product_data = scraper.scrape_product(product_url)
                             
                             if product_data and product_data.get('title'):
-                                # Save to database
-                                if db.save_product(product_data):
-                                    category_saved += 1
-                                    total_products_saved += 1
-                                    print(f"    [OK] Saved: {product_data['title'][:50]}...")
-                                    print(f"    Price: {product_data.get('price', 'N/A')}")
-                                    print(f"    Category: {product_data.get('category', 'N/A')}")
-                                else:
-                                    print(f"    ❌ Failed to save product")
-                                    total_errors += 1
+                                pending_products.append(product_data)
+                                print(f"    [OK] Scraped: {product_data['title'][:50]}...")
+                                print(f"    Price: {product_data.get('price', 'N/A')}")
+                                print(f"    Category: {product_data.get('category', 'N/A')}")
                             else:
                                 print(f"    ❌ Failed to scrape product data")
                                 total_errors += 1
@@ -407,6 +420,12 @@ def main():
                             total_errors += 1
                             print(f"    ❌ Error with product: {e}")
                     
+                    category_saved = db.save_products(pending_products)
+                    total_products_saved += category_saved
+                    if category_saved < len(pending_products):
+                        total_errors += len(pending_products) - category_saved
+                        print(f"    ❌ Failed to save {len(pending_products) - category_saved} products")
+                    
                     print(f"  Category {category_name}: {category_saved} products saved")
                     
                 except Exception as e:
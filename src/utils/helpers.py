@@ -1,10 +1,20 @@
 """
 Helper utilities and common functions
 """
+import hashlib
+import math
 import re
-from urllib.parse import urlparse, urljoin
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse, urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 from datetime import datetime
 
+# Optional C Aho-Corasick automaton for keyword matching; without it keywords are checked one by one
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 def extract_currency_from_price(price_text):
     """
     Extract currency from price text
@@ -50,10 +60,305 @@ def detect_source_website(url):
         domain = urlparse(url).netloc
         return domain
 
+class KeywordGroupMatcher:
+    """
+    Finds the highest-priority group of keywords occurring in a text
+    
+    With pyahocorasick installed, all keywords are compiled into one automaton that
+    reports every hit in a single pass over the text. Otherwise each group's keywords
+    are checked as plain substrings, in priority order.
+    """
+    
+    def __init__(self, keyword_groups):
+        """
+        Build the matcher
+        
+        Args:
+            keyword_groups (dict): Keywords per value, in priority order
+        """
+        self.keyword_groups = keyword_groups
+        self._automaton = None
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for priority, (value, keywords) in enumerate(keyword_groups.items()):
+                for keyword in keywords:
+                    # A keyword listed in several groups belongs to the first one
+                    if keyword not in automaton:
+                        automaton.add_word(keyword, (priority, value))
+            automaton.make_automaton()
+            self._automaton = automaton
+    
+    def match(self, text):
+        """
+        Find the first group with a keyword occurring in text
+        
+        Args:
+            text (str): Text to search
+            
+        Returns:
+            Key of the first matching group, or None if no keyword occurs
+        """
+        if self._automaton is None:
+            for value, keywords in self.keyword_groups.items():
+                for keyword in keywords:
+                    if keyword in text:
+                        return value
+            return None
+        
+        best = None
+        for _, hit in self._automaton.iter(text):
+            if best is None or hit[0] < best[0]:
+                best = hit
+                if best[0] == 0:
+                    break  # Nothing outranks the first group
+        return best[1] if best else None
+
+class BloomFilter:
+    """
+    Scalable Bloom filter for remembering large numbers of strings (e.g. visited URLs)
+    
+    Uses a few bits per entry instead of storing the strings themselves. Membership
+    checks may rarely report an unseen string as present (at about error_rate), but
+    never miss one that was added. When a slice fills up, a larger one with a tighter
+    error rate is added, so the overall rate stays bounded as the filter grows.
+    """
+    
+    def __init__(self, capacity=100000, error_rate=1e-4):
+        """
+        Create an empty filter
+        
+        Args:
+            capacity (int): Entries the first slice holds before the filter grows
+            error_rate (float): Target false-positive rate
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Adds read-modify-write the bit arrays, and scrapers share one filter across fetch threads
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._slices = []
+            self._count = 0
+            self._add_slice()
+    
+    def _add_slice(self):
+        """Add a slice twice the size of the last, at half its error rate"""
+        level = len(self._slices)
+        capacity = self.capacity * 2 ** level
+        error_rate = self.error_rate * 0.5 ** (level + 1)
+        
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self._slices.append({'bits': bytearray((num_bits + 7) // 8), 'num_bits': num_bits,
+                             'num_hashes': num_hashes, 'capacity': capacity, 'count': 0})
+    
+    @staticmethod
+    def _hashes(item):
+        """Two independent 64-bit hashes of the item for double hashing"""
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+    
+    @staticmethod
+    def _positions(bloom_slice, h1, h2):
+        """Bit positions for an item within one slice"""
+        num_bits = bloom_slice['num_bits']
+        return ((h1 + i * h2) % num_bits for i in range(bloom_slice['num_hashes']))
+    
+    def __contains__(self, item):
+        h1, h2 = self._hashes(item)
+        for bloom_slice in self._slices:
+            bits = bloom_slice['bits']
+            if all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(bloom_slice, h1, h2)):
+                return True
+        return False
+    
+    def __len__(self):
+        return self._count
+    
+    def add(self, item):
+        """
+        Add an item to the filter
+        
+        Args:
+            item (str): Item to remember
+        """
+        # Check and mark together so concurrent adds can't lose each other's bits or counts
+        with self._lock:
+            if item in self:
+                return
+            
+            if self._slices[-1]['count'] >= self._slices[-1]['capacity']:
+                self._add_slice()
+            
+            bloom_slice = self._slices[-1]
+            bits = bloom_slice['bits']
+            for pos in self._positions(bloom_slice, *self._hashes(item)):
+                bits[pos >> 3] |= 1 << (pos & 7)
+            bloom_slice['count'] += 1
+            self._count += 1
+
+# Enhanced category keywords with Arabic support and more specific categories
+# Order matters: more specific keywords first
+CATEGORY_KEYWORDS = {
+    # Specific appliances first (to avoid conflicts)
+    'Small Home Appliances': [
+        'microwave', 'blender', 'mixer', 'toaster', 'coffee maker', 'kettle',
+        'iron', 'vacuum', 'cleaner', 'air fryer', 'juicer', 'food processor',
+        'rice cooker', 'slow cooker', 'pressure cooker',
+        'مايكروويف', 'خلاط', 'محمصة', 'مكواة', 'مكنسة'
+    ],
+    'Kitchen Appliances': [
+        'kitchen appliance', 'cooking appliance', 'baking', 'chef', 'culinary', 'food prep',
+        'مطبخ', 'طبخ'
+    ],
+    'Large Home Appliances': [
+        'washing machine', 'washer', 'dryer', 'refrigerator', 'fridge', 'dishwasher',
+        'oven', 'stove', 'range', 'freezer', 'غسالة', 'ثلاجة', 'مجمد'
+    ],
+    'Air Conditioners & Cooling': [
+        'air conditioner', 'ac', 'cooling', 'fan', 'heater', 'humidifier',
+        'dehumidifier', 'air purifier', 'مكيف', 'تكييف', 'مروحة', 'تبريد'
+    ],
+
+    # Personal Care
+    'Personal Care': [
+        'shaver', 'epilator', 'grooming', 'personal care', 'trimmer', 'hair dryer',
+        'straightener', 'curler', 'electric toothbrush', 'ماكينة حلاقة', 'تشذيب'
+    ],
+
+    # Power & Connectivity (specific terms first)
+    'Power & Batteries': [
+        'power bank', 'powerbank', 'powercore', 'battery pack', 'portable battery', 'battery charger',
+        'ups', 'uninterruptible power supply', 'power supply', 'generator',
+        'solar panel', 'بطارية', 'طاقة'
+    ],
+    'Networking': [
+        'router', 'wifi router', 'wireless router', 'modem', 'network', 'ethernet', 
+        'switch', 'access point', 'range extender', 'راوتر', 'مودم', 'شبكة'
+    ],
+
+    # Gaming
+    'Gaming': [
+        'gaming', 'game console', 'console', 'playstation', 'xbox', 'nintendo', 'ps5', 'ps4',
+        'controller', 'joystick', 'gaming chair', 'gaming mouse', 'gaming keyboard',
+        'ألعاب', 'بلايستيشن'
+    ],
+
+    # Audio & Entertainment
+    'Audio & Sound': [
+        'speaker', 'bluetooth speaker', 'wireless speaker', 'soundbar', 'subwoofer', 
+        'headphone', 'headphones', 'earphone', 'earphones', 'headset', 'earbuds',
+        'amplifier', 'microphone', 'audio system', 'sound system',
+        'سماعة', 'صوت', 'مكبر'
+    ],
+    'TVs & Monitors': [
+        'television', 'smart tv', 'led tv', 'oled', 'qled', 'lcd tv', '4k tv', '8k tv',
+        'monitor', 'display', 'screen', 'computer monitor', 'gaming monitor',
+        'تلفزيون', 'تلفاز', 'شاشة', 'مونيتر'
+    ],
+
+    # Computing
+    'Computers & Laptops': [
+        'laptop', 'notebook', 'ultrabook', 'chromebook', 'macbook', 'vivobook',
+        'computer', 'desktop', 'pc', 'workstation', 'gaming pc', 'all-in-one pc',
+        'book amd', 'book intel', 'book ryzen',  # Specific laptop patterns
+        'كمبيوتر', 'لابتوب', 'حاسوب'
+    ],
+    'Tablets': [
+        'tablet', 'ipad', 'android tablet', 'windows tablet', 'kindle', 'surface tablet',
+        'تابلت', 'لوح'
+    ],
+
+    # Mobile & Communication (check exact patterns first)
+    'Mobile Phones': [
+        'smartphone', 'mobile phone', 'cell phone', 'iphone', 'android phone',
+        'galaxy phone', 'galaxy s', 'galaxy note', 'pixel phone', 'nokia phone',
+        'samsung phone', 'oppo phone', 'huawei phone', 'xiaomi phone',
+        'phone'  # Keep generic 'phone' last to avoid conflicts
+    ],
+
+    # Wearables & Health
+    'Wearables': [
+        'smartwatch', 'smart watch', 'fitness tracker', 'fitness band', 'activity tracker',
+        'sports watch', 'running watch', 'apple watch', 'galaxy watch', 'fitbit',
+        'fitness band', 'wearable device', 'health tracker', 'charge 6', 'charge 5',
+        'ساعة ذكية', 'ساعة رياضية'
+    ],
+
+    # Cameras & Photography
+    'Cameras & Photography': [
+        'camera', 'digital camera', 'dslr', 'mirrorless camera', 'action camera',
+        'camcorder', 'video camera', 'gopro', 'photo', 'photography',
+        'كاميرا', 'تصوير'
+    ],
+
+    # Accessories (most general, check last)
+    'Accessories': [
+        'phone case', 'case', 'tablet case', 'laptop case', 'screen protector',
+        'phone charger', 'charger', 'cable', 'adapter', 'mount', 'stand', 'holder',
+        'car charger', 'wireless charger', 'protector', 'cover',
+        'كفر', 'حامل'
+    ]
+}
+
+# Brand-based categorization for ambiguous cases
+BRAND_PATTERNS = {
+    'Computers & Laptops': [
+        'asus laptop', 'asus notebook', 'asus vivobook', 'asus zenbook', 'asus gaming',
+        'dell laptop', 'dell inspiron', 'dell xps', 'hp laptop', 'hp pavilion',
+        'lenovo laptop', 'lenovo thinkpad', 'lenovo ideapad'
+    ],
+    'Mobile Phones': [
+        'oppo', 'huawei', 'xiaomi', 'oneplus', 'realme', 'vivo phone', 'vivo smartphone', 
+        'nokia phone', 'motorola phone'
+    ],
+    'Gaming': [
+        'razer gaming', 'logitech gaming', 'corsair gaming', 'asus gaming', 'msi gaming'
+    ],
+    'Audio & Sound': [
+        'bose', 'jbl', 'beats', 'sennheiser', 'sony audio', 'harman kardon'
+    ],
+    'Cameras & Photography': [
+        'canon camera', 'nikon camera', 'sony camera', 'fujifilm', 'olympus camera'
+    ],
+    'Personal Care': [
+        'braun grooming', 'gillette', 'panasonic grooming', 'remington'
+    ],
+    'Kitchen Appliances': [
+        'kitchenaid', 'cuisinart', 'hamilton beach', 'ninja kitchen'
+    ]
+}
+
+# URL pattern matching for additional context (more specific patterns first)
+URL_PATTERNS = {
+    'Power & Batteries': ['/power-bank/', '/battery/', '/ups/', '/power/'],
+    'Wearables': ['/fitness-tracker/', '/smartwatch/', '/watch/', '/fitness/', '/wearable/', '/tracker/'],
+    'Computers & Laptops': ['/laptop/', '/computer/', '/pc/', '/notebook/', '/macbook/'],
+    'Accessories': ['/accessory/', '/case/', '/cover/'],
+    'Kitchen Appliances': ['/kitchen/', '/cooking/', '/microwave/'],
+    'Mobile Phones': ['/mobile/', '/phone/', '/smartphone/', '/iphone/', '/galaxy/'],
+    'TVs & Monitors': ['/tv/', '/television/', '/monitor/', '/display/'],
+    'Audio & Sound': ['/audio/', '/speaker/', '/headphone/', '/sound/', '/headset/'],
+    'Gaming': ['/gaming/', '/console/', '/game/', '/playstation/', '/xbox/'],
+    'Large Home Appliances': ['/appliance/', '/washing/', '/refrigerator/', '/washer/'],
+    'Personal Care': ['/grooming/', '/personal-care/', '/shaver/'],
+    'Networking': ['/network/', '/router/', '/wifi/']
+}
+
+# Matchers built once at import for the keyword tables above
+_CATEGORY_MATCHER = KeywordGroupMatcher(CATEGORY_KEYWORDS)
+_BRAND_MATCHER = KeywordGroupMatcher(BRAND_PATTERNS)
+_URL_MATCHER = KeywordGroupMatcher(URL_PATTERNS)
+
+@lru_cache(maxsize=65536)
 def classify_product_category(url, title):
     """
     Classify product into category based on URL and title
     Enhanced version with better patterns, Arabic support, and more categories
+    Results are memoized since the same products are classified repeatedly
     
     Args:
         url (str): Product URL
@@ -66,174 +371,12 @@ def classify_product_category(url, title):
     title_lower = title.lower() if title else ''
     combined_text = f"{url_lower} {title_lower}"
     
-    # Enhanced category keywords with Arabic support and more specific categories
-    # Order matters: more specific keywords first
-    categories = {
-        # Specific appliances first (to avoid conflicts)
-        'Small Home Appliances': [
-            'microwave', 'blender', 'mixer', 'toaster', 'coffee maker', 'kettle',
-            'iron', 'vacuum', 'cleaner', 'air fryer', 'juicer', 'food processor',
-            'rice cooker', 'slow cooker', 'pressure cooker',
-            'مايكروويف', 'خلاط', 'محمصة', 'مكواة', 'مكنسة'
-        ],
-        'Kitchen Appliances': [
-            'kitchen appliance', 'cooking appliance', 'baking', 'chef', 'culinary', 'food prep',
-            'مطبخ', 'طبخ'
-        ],
-        'Large Home Appliances': [
-            'washing machine', 'washer', 'dryer', 'refrigerator', 'fridge', 'dishwasher',
-            'oven', 'stove', 'range', 'freezer', 'غسالة', 'ثلاجة', 'مجمد'
-        ],
-        'Air Conditioners & Cooling': [
-            'air conditioner', 'ac', 'cooling', 'fan', 'heater', 'humidifier',
-            'dehumidifier', 'air purifier', 'مكيف', 'تكييف', 'مروحة', 'تبريد'
-        ],
-        
-        # Personal Care
-        'Personal Care': [
-            'shaver', 'epilator', 'grooming', 'personal care', 'trimmer', 'hair dryer',
-            'straightener', 'curler', 'electric toothbrush', 'ماكينة حلاقة', 'تشذيب'
-        ],
-        
-        # Power & Connectivity (specific terms first)
-        'Power & Batteries': [
-            'power bank', 'powerbank', 'powercore', 'battery pack', 'portable battery', 'battery charger',
-            'ups', 'uninterruptible power supply', 'power supply', 'generator',
-            'solar panel', 'بطارية', 'طاقة'
-        ],
-        'Networking': [
-            'router', 'wifi router', 'wireless router', 'modem', 'network', 'ethernet', 
-            'switch', 'access point', 'range extender', 'راوتر', 'مودم', 'شبكة'
-        ],
-        
-        # Gaming
-        'Gaming': [
-            'gaming', 'game console', 'console', 'playstation', 'xbox', 'nintendo', 'ps5', 'ps4',
-            'controller', 'joystick', 'gaming chair', 'gaming mouse', 'gaming keyboard',
-            'ألعاب', 'بلايستيشن'
-        ],
-        
-        # Audio & Entertainment
-        'Audio & Sound': [
-            'speaker', 'bluetooth speaker', 'wireless speaker', 'soundbar', 'subwoofer', 
-            'headphone', 'headphones', 'earphone', 'earphones', 'headset', 'earbuds',
-            'amplifier', 'microphone', 'audio system', 'sound system',
-            'سماعة', 'صوت', 'مكبر'
-        ],
-        'TVs & Monitors': [
-            'television', 'smart tv', 'led tv', 'oled', 'qled', 'lcd tv', '4k tv', '8k tv',
-            'monitor', 'display', 'screen', 'computer monitor', 'gaming monitor',
-            'تلفزيون', 'تلفاز', 'شاشة', 'مونيتر'
-        ],
-        
-        # Computing
-        'Computers & Laptops': [
-            'laptop', 'notebook', 'ultrabook', 'chromebook', 'macbook', 'vivobook',
-            'computer', 'desktop', 'pc', 'workstation', 'gaming pc', 'all-in-one pc',
-            'book amd', 'book intel', 'book ryzen',  # Specific laptop patterns
-            'كمبيوتر', 'لابتوب', 'حاسوب'
-        ],
-        'Tablets': [
-            'tablet', 'ipad', 'android tablet', 'windows tablet', 'kindle', 'surface tablet',
-            'تابلت', 'لوح'
-        ],
-        
-        # Mobile & Communication (check exact patterns first)
-        'Mobile Phones': [
-            'smartphone', 'mobile phone', 'cell phone', 'iphone', 'android phone',
-            'galaxy phone', 'galaxy s', 'galaxy note', 'pixel phone', 'nokia phone',
-            'samsung phone', 'oppo phone', 'huawei phone', 'xiaomi phone',
-            'phone'  # Keep generic 'phone' last to avoid conflicts
-        ],
-        
-        # Wearables & Health
-        'Wearables': [
-            'smartwatch', 'smart watch', 'fitness tracker', 'fitness band', 'activity tracker',
-            'sports watch', 'running watch', 'apple watch', 'galaxy watch', 'fitbit',
-            'fitness band', 'wearable device', 'health tracker', 'charge 6', 'charge 5',
-            'ساعة ذكية', 'ساعة رياضية'
-        ],
-        
-        # Cameras & Photography
-        'Cameras & Photography': [
-            'camera', 'digital camera', 'dslr', 'mirrorless camera', 'action camera',
-            'camcorder', 'video camera', 'gopro', 'photo', 'photography',
-            'كاميرا', 'تصوير'
-        ],
-        
-        # Accessories (most general, check last)
-        'Accessories': [
-            'phone case', 'case', 'tablet case', 'laptop case', 'screen protector',
-            'phone charger', 'charger', 'cable', 'adapter', 'mount', 'stand', 'holder',
-            'car charger', 'wireless charger', 'protector', 'cover',
-            'كفر', 'حامل'
-        ]
-    }
-    
-    # Check each category for exact keyword matches
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in combined_text:
-                return category
-    
-    # Brand-based categorization for ambiguous cases
-    brand_patterns = {
-        'Computers & Laptops': [
-            'asus laptop', 'asus notebook', 'asus vivobook', 'asus zenbook', 'asus gaming',
-            'dell laptop', 'dell inspiron', 'dell xps', 'hp laptop', 'hp pavilion',
-            'lenovo laptop', 'lenovo thinkpad', 'lenovo ideapad'
-        ],
-        'Mobile Phones': [
-            'oppo', 'huawei', 'xiaomi', 'oneplus', 'realme', 'vivo phone', 'vivo smartphone', 
-            'nokia phone', 'motorola phone'
-        ],
-        'Gaming': [
-            'razer gaming', 'logitech gaming', 'corsair gaming', 'asus gaming', 'msi gaming'
-        ],
-        'Audio & Sound': [
-            'bose', 'jbl', 'beats', 'sennheiser', 'sony audio', 'harman kardon'
-        ],
-        'Cameras & Photography': [
-            'canon camera', 'nikon camera', 'sony camera', 'fujifilm', 'olympus camera'
-        ],
-        'Personal Care': [
-            'braun grooming', 'gillette', 'panasonic grooming', 'remington'
-        ],
-        'Kitchen Appliances': [
-            'kitchenaid', 'cuisinart', 'hamilton beach', 'ninja kitchen'
-        ]
-    }
-    
-    # Check brand patterns
-    for category, brands in brand_patterns.items():
-        for brand in brands:
-            if brand in combined_text:
-                return category
-    
-    # URL pattern matching for additional context (more specific patterns first)
-    url_patterns = {
-        'Power & Batteries': ['/power-bank/', '/battery/', '/ups/', '/power/'],
-        'Wearables': ['/fitness-tracker/', '/smartwatch/', '/watch/', '/fitness/', '/wearable/', '/tracker/'],
-        'Computers & Laptops': ['/laptop/', '/computer/', '/pc/', '/notebook/', '/macbook/'],
-        'Accessories': ['/accessory/', '/case/', '/cover/'],
-        'Kitchen Appliances': ['/kitchen/', '/cooking/', '/microwave/'],
-        'Mobile Phones': ['/mobile/', '/phone/', '/smartphone/', '/iphone/', '/galaxy/'],
-        'TVs & Monitors': ['/tv/', '/television/', '/monitor/', '/display/'],
-        'Audio & Sound': ['/audio/', '/speaker/', '/headphone/', '/sound/', '/headset/'],
-        'Gaming': ['/gaming/', '/console/', '/game/', '/playstation/', '/xbox/'],
-        'Large Home Appliances': ['/appliance/', '/washing/', '/refrigerator/', '/washer/'],
-        'Personal Care': ['/grooming/', '/personal-care/', '/shaver/'],
-        'Networking': ['/network/', '/router/', '/wifi/']
-    }
-    
-    for category, patterns in url_patterns.items():
-        if any(pattern in url_lower for pattern in patterns):
-            return category
-    
-    # Final fallback: check for common electronics terms
-    electronics_keywords = ['electronic', 'digital', 'smart', 'tech', 'device']
-    if any(keyword in combined_text for keyword in electronics_keywords):
-        return 'Electronics'
+    # Exact keyword matches first, then brand patterns, then URL patterns for additional context
+    category = (_CATEGORY_MATCHER.match(combined_text)
+                or _BRAND_MATCHER.match(combined_text)
+                or _URL_MATCHER.match(url_lower))
+    if category:
+        return category
     
     return 'Electronics'
 
@@ -356,6 +499,32 @@ def normalize_url(url, base_url):
     
     return normalized
 
+# Query parameters that only track the visit and never change the page
+TRACKING_QUERY_PARAMS = frozenset({'fbclid', 'gclid', 'msclkid'})
+
+def url_visit_key(url):
+    """
+    Reduce a URL to the key used for "already scraped" checks, so links that differ
+    only by a fragment or tracking parameters (utm_*, fbclid, ...) count as one page
+    
+    Args:
+        url (str): Absolute URL
+        
+    Returns:
+        str: URL without fragment or tracking query parameters
+    """
+    # Most links carry neither, so skip the parse entirely
+    if '#' not in url and '?' not in url:
+        return url
+    
+    parts = urlsplit(url)
+    query = parts.query
+    if query:
+        params = [(name, value) for name, value in parse_qsl(query, keep_blank_values=True)
+                  if not name.startswith('utm_') and name not in TRACKING_QUERY_PARAMS]
+        query = urlencode(params)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
 def create_product_template(url):
     """
     Create a standard product data template
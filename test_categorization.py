@@ -107,15 +107,16 @@ def test_existing_products():
         from database.manager import DatabaseManager
         
         with DatabaseManager() as db:
-            products = list(db.products.find({}))
+            total_products = db.products.count_documents({})
             
-            if not products:
+            if not total_products:
                 print("❌ No products found in database")
                 return
             
-            print(f"📊 Found {len(products)} products")
+            print(f"📊 Found {total_products} products")
             print()
             
+            products = db.products.find({}, {'url': 1, 'title': 1, 'category': 1}).batch_size(1000)
             for i, product in enumerate(products, 1):
                 url = product.get('url', '')
                 title = product.get('title', '')